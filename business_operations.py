@@ -7,6 +7,7 @@ from database_models import Restaurant
 from datetime import datetime, time
 import pytz
 from pathlib import Path
+import time as time_module
 
 # Database imports
 from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey, JSON
@@ -77,20 +78,35 @@ DATA_DIR.mkdir(exist_ok=True)
 # Default tax rate (6% - individual restaurants can override this)
 DEFAULT_TAX_RATE = 0.06
 
+# Tax rates rarely change, so database lookups are cached per restaurant for a few minutes
+TAX_RATE_CACHE_TTL_SECONDS = 300
+_TAX_RATE_CACHE: Dict[str, tuple] = {}
+
 def get_restaurant_tax_rate(restaurant_id: str) -> float:
     """Get the tax rate for a specific restaurant from database"""
+    cached = _TAX_RATE_CACHE.get(restaurant_id)
+    if cached and cached[1] > time_module.monotonic():
+        return cached[0]
+
     try:
         # First try to get from database
-        db = next(get_db())
-        # Convert restaurant_id to int for database query
-        restaurant_id_int = int(restaurant_id)
-        restaurant = db.query(Restaurant).filter(Restaurant.id == restaurant_id_int).first()
+        db = SessionLocal()
+        try:
+            # Convert restaurant_id to int for database query
+            restaurant_id_int = int(restaurant_id)
+            restaurant = db.query(Restaurant).filter(Restaurant.id == restaurant_id_int).first()
+        finally:
+            db.close()
+
         if restaurant and restaurant.tax_rate:
-            return restaurant.tax_rate
-            
-        # Fallback to default if restaurant not found
-        logger.warning(f"Restaurant {restaurant_id} not found in database, using default tax rate")
-        return DEFAULT_TAX_RATE
+            tax_rate = restaurant.tax_rate
+        else:
+            # Fallback to default if restaurant not found
+            logger.warning(f"Restaurant {restaurant_id} not found in database, using default tax rate")
+            tax_rate = DEFAULT_TAX_RATE
+
+        _TAX_RATE_CACHE[restaurant_id] = (tax_rate, time_module.monotonic() + TAX_RATE_CACHE_TTL_SECONDS)
+        return tax_rate
         
     except Exception as e:
         logger.warning(f"Could not load tax rate for restaurant {restaurant_id} from database: {str(e)}")
@@ -224,6 +240,38 @@ def lookup_or_create_customer(db: Session, phone_number: str, customer_name: str
         db.refresh(new_customer)
         return new_customer
 
+def upsert_customer(db: Session, phone_number: str, customer_name: str = None) -> int:
+    """Create or update a customer in a single statement and return its id (caller commits)"""
+    clean_phone = ''.join(filter(str.isdigit, phone_number))
+    clean_name = customer_name.strip() if customer_name and customer_name.strip() else None
+    now = datetime.utcnow()
+
+    # INSERT ... ON CONFLICT is dialect specific; both PostgreSQL and SQLite support it
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+
+    stmt = dialect_insert(Customer).values(
+        phone_number=clean_phone,
+        name=clean_name,
+        created_at=now,
+        updated_at=now,
+        last_call_at=now
+    )
+
+    # Existing customers get a fresh call time, and the latest name if one was given
+    update_values = {"last_call_at": stmt.excluded.last_call_at}
+    if clean_name:
+        update_values["name"] = stmt.excluded.name
+        update_values["updated_at"] = stmt.excluded.updated_at
+
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Customer.phone_number],
+        set_=update_values
+    ).returning(Customer.id)
+    return db.execute(stmt).scalar_one()
+
 def get_current_time_eastern() -> datetime:
     """Get current time in Eastern timezone"""
     eastern = pytz.timezone('America/New_York')
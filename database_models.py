@@ -1,8 +1,9 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey, JSON, text
+from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey, JSON, text, inspect
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 from datetime import datetime
 import os
+import orjson
 
 Base = declarative_base()
 
@@ -104,6 +105,11 @@ def get_database_url():
 
 DATABASE_URL = get_database_url()
 
+def _json_serializer(value):
+    """Serialize JSON column values with orjson"""
+    return orjson.dumps(value).decode()
+
+
 # Create engine with appropriate settings for PostgreSQL vs SQLite
 if DATABASE_URL.startswith("postgresql://"):
     # PostgreSQL settings
@@ -111,6 +117,8 @@ if DATABASE_URL.startswith("postgresql://"):
         DATABASE_URL,
         pool_pre_ping=True,
         pool_recycle=300,
+        json_serializer=_json_serializer,
+        json_deserializer=orjson.loads,
         echo=False  # Set to True for SQL debugging
     )
 else:
@@ -118,14 +126,27 @@ else:
     engine = create_engine(
         DATABASE_URL,
         connect_args={"check_same_thread": False},
+        json_serializer=_json_serializer,
+        json_deserializer=orjson.loads,
         echo=False
     )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Set once the schema is known to exist so repeat calls skip reflection and DDL
+_TABLES_READY = False
+
 def create_tables():
     """Create all tables"""
-    Base.metadata.create_all(bind=engine)
+    global _TABLES_READY
+    if _TABLES_READY:
+        return
+
+    # One reflection query tells us whether any model table is missing
+    existing_tables = set(inspect(engine).get_table_names())
+    if not set(Base.metadata.tables).issubset(existing_tables):
+        Base.metadata.create_all(bind=engine)
+    _TABLES_READY = True
     print(f"✅ Database tables created/verified using: {DATABASE_URL.split('@')[0] if '@' in DATABASE_URL else DATABASE_URL}")
 
 def get_db():
@@ -22,7 +22,7 @@ logger = logging.getLogger(__name__)
 # Import the internal functions directly from business_operations
 from business_operations import _check_lunch_hours, load_store_hours, save_store_hours, calculate_item_total
 from business_operations import OrderRequest, OrderTotalResponse, StoreHours, get_restaurant_tax_rate, DynamicVariablesResponse
-from business_operations import get_db, lookup_or_create_customer, get_current_time_eastern, format_time_for_voice, calculate_pickup_time
+from business_operations import get_db, lookup_or_create_customer, upsert_customer, get_current_time_eastern, format_time_for_voice, calculate_pickup_time
 from business_operations import get_day_name, is_time_in_business_hours, Customer
 from datetime import datetime
 from sqlalchemy.orm import Session
@@ -34,7 +34,18 @@ from database_models import test_database_connection
 from pos_integrations import pos_manager, initialize_pos_systems, create_pos_order_data, POSSystemType
 
 # Import Pydantic for request/response models
-from pydantic import BaseModel
+from pydantic import BaseModel, model_validator
+
+class RetellToolRequest(BaseModel):
+    """Base model for tool requests that accept both direct and Retell wrapper payloads"""
+
+    @model_validator(mode="before")
+    @classmethod
+    def unwrap_retell_args(cls, data):
+        """Retell sends {"call": {...}, "name": "...", "args": {actual_data}}"""
+        if isinstance(data, dict) and isinstance(data.get("args"), dict):
+            return data["args"]
+        return data
 
 # USAePay models
 class CreditCardRequest(BaseModel):
@@ -61,7 +72,7 @@ class CreditCardResponse(BaseModel):
     cvv_result: Optional[str] = None
 
 # Twilio SMS models
-class SMSRequest(BaseModel):
+class SMSRequest(RetellToolRequest):
     """Request model for sending SMS via Twilio"""
     customer_phone: str
     message: str
@@ -89,7 +100,7 @@ class PlaceOrderItem(BaseModel):
     modifiers: list[PlaceOrderModifier]
     item_quantity: int
 
-class PlaceOrderRequest(BaseModel):
+class PlaceOrderRequest(RetellToolRequest):
     """Request model for placing an order"""
     customer_address: Optional[str] = ""
     credit_card_number: Optional[str] = ""
@@ -120,6 +131,9 @@ class PlaceOrderResponse(BaseModel):
     pos_integration: Optional[dict] = None  # POS system integration status
     sms_confirmation: Optional[dict] = None  # SMS confirmation status
 
+# Order types that are collected by the customer rather than delivered
+PICKUP_ORDER_TYPES = frozenset({"pickup", "pick_up", "pick-up"})
+
 # Create main FastAPI app
 app = FastAPI(
     title="Keyra Restaurant API",
@@ -757,6 +771,9 @@ async def recommend(request: Request, restaurant_id: str = Query(..., descriptio
             "message": "Missing dependencies for recommendation engine",
             "available_services": ["business_hours", "lunch_hours", "order_total", "store_hours"]
         }
+    except HTTPException:
+        # Keep the 400/404 raised for invalid args or an unknown restaurant
+        raise
     except Exception as e:
         logger.error(f"Error getting recommendation: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to get recommendation")
@@ -873,7 +890,7 @@ async def charge_credit_card(card_request: CreditCardRequest):
 
 # Twilio SMS Endpoint
 @app.post("/send-text-message", response_model=SMSResponse)
-async def send_text_message(request: Request):
+async def send_text_message(sms_request: SMSRequest):
     """
     Send an SMS message to a customer using Twilio.
     
@@ -888,37 +905,8 @@ async def send_text_message(request: Request):
     - TWILIO_PHONE_NUMBER: Your Twilio phone number (from number)
     """
     try:
-        # Get raw request body and parse
-        body = await request.body()
-        raw_body = body.decode('utf-8') if body else ''
-        logger.info(f"SMS REQUEST BODY: {raw_body}")
-        
-        import json
-        try:
-            json_data = json.loads(raw_body) if raw_body else {}
-            logger.info(f"SMS PARSED JSON: {json_data}")
-        except json.JSONDecodeError as je:
-            logger.error(f"SMS JSON DECODE ERROR: {str(je)}")
-            raise HTTPException(status_code=400, detail=f"Invalid JSON: {str(je)}")
-        
-        # Extract SMS data - handle both direct format and Retell wrapper format
-        if 'args' in json_data and isinstance(json_data['args'], dict):
-            # Retell format: {"call": {...}, "name": "...", "args": {actual_sms_data}}
-            sms_data = json_data['args']
-            logger.info(f"EXTRACTED SMS DATA FROM RETELL WRAPPER: {sms_data}")
-        else:
-            # Direct format: {sms_data}
-            sms_data = json_data
-            logger.info(f"USING DIRECT SMS DATA: {sms_data}")
-        
-        # Validate SMS request data
-        try:
-            sms_request = SMSRequest(**sms_data)
-            logger.info(f"SMS VALIDATION SUCCESS: {sms_request}")
-        except Exception as validation_error:
-            logger.error(f"SMS VALIDATION ERROR: {str(validation_error)}")
-            logger.error(f"SMS DATA THAT FAILED VALIDATION: {sms_data}")
-            raise HTTPException(status_code=422, detail=f"Validation error: {str(validation_error)}")
+        # Request body (direct or Retell wrapper format) is validated by FastAPI into SMSRequest
+        logger.info(f"SMS REQUEST: {sms_request}")
         
         # Get Twilio configuration from environment variables
         account_sid = os.getenv("TWILIO_ACCOUNT_SID")
@@ -998,7 +986,7 @@ async def send_text_message(request: Request):
 # Place Order Endpoint
 @app.post("/place-order", response_model=PlaceOrderResponse)
 async def place_order(
-    request: Request,
+    order_request: PlaceOrderRequest,
     restaurant_id: str = Query(..., description="Restaurant ID"),
     db: Session = Depends(get_db)
 ):
@@ -1019,37 +1007,8 @@ async def place_order(
     For SMS notifications, requires Twilio environment variables.
     """
     try:
-        # Get raw request body and parse
-        body = await request.body()
-        raw_body = body.decode('utf-8') if body else ''
-        logger.info(f"PLACE ORDER REQUEST BODY: {raw_body}")
-        
-        import json
-        try:
-            json_data = json.loads(raw_body) if raw_body else {}
-            logger.info(f"PLACE ORDER PARSED JSON: {json_data}")
-        except json.JSONDecodeError as je:
-            logger.error(f"PLACE ORDER JSON DECODE ERROR: {str(je)}")
-            raise HTTPException(status_code=400, detail=f"Invalid JSON: {str(je)}")
-        
-        # Extract order data - handle both direct format and Retell wrapper format
-        if 'args' in json_data and isinstance(json_data['args'], dict):
-            # Retell format: {"call": {...}, "name": "...", "args": {actual_order_data}}
-            order_data = json_data['args']
-            logger.info(f"EXTRACTED ORDER DATA FROM RETELL WRAPPER: {order_data}")
-        else:
-            # Direct format: {order_data}
-            order_data = json_data
-            logger.info(f"USING DIRECT ORDER DATA: {order_data}")
-        
-        # Validate order request data
-        try:
-            order_request = PlaceOrderRequest(**order_data)
-            logger.info(f"ORDER VALIDATION SUCCESS: {order_request.customer_name}")
-        except Exception as validation_error:
-            logger.error(f"ORDER VALIDATION ERROR: {str(validation_error)}")
-            logger.error(f"ORDER DATA THAT FAILED VALIDATION: {order_data}")
-            raise HTTPException(status_code=422, detail=f"Validation error: {str(validation_error)}")
+        # Request body (direct or Retell wrapper format) is validated by FastAPI into PlaceOrderRequest
+        logger.info(f"PLACE ORDER REQUEST: {order_request.customer_name} ({len(order_request.order_items)} items)")
         
         # Calculate order total using existing business logic
         subtotal = 0
@@ -1172,19 +1131,12 @@ async def place_order(
             payment_status = "cash"
             logger.info("Cash payment selected")
         
-        # Create or update customer with name from order
-        customer = lookup_or_create_customer(db, order_request.customer_phone, order_request.customer_name)
-        
-        # Ensure customer name is saved if provided in order
-        if order_request.customer_name and order_request.customer_name.strip():
-            if not customer.name or customer.name != order_request.customer_name.strip():
-                customer.name = order_request.customer_name.strip()
-                customer.updated_at = datetime.now(datetime.UTC)
-                db.commit()
-                logger.info(f"Saved customer name '{customer.name}' for phone {customer.phone_number}")
+        # Create or update customer with name from order (committed together with the order below)
+        customer_id = upsert_customer(db, order_request.customer_phone, order_request.customer_name)
         
         # Store order in database
         from database_models import Order
+        from sqlalchemy import insert
         
         # Prepare complete order data for storage
         order_data_for_db = {
@@ -1230,20 +1182,19 @@ async def place_order(
             "item_breakdown": item_breakdown
         }
         
-        # Create order record
-        new_order = Order(
-            customer_id=customer.id,
-            restaurant_id=int(restaurant_id),
-            order_data=order_data_for_db,
-            total_amount=total_amount
-        )
-        
-        db.add(new_order)
+        # Create order record (single INSERT ... RETURNING, no ORM refresh)
+        order_id = db.execute(
+            insert(Order).values(
+                customer_id=customer_id,
+                restaurant_id=int(restaurant_id),
+                order_data=order_data_for_db,
+                total_amount=total_amount
+            ).returning(Order.id)
+        ).scalar_one()
         db.commit()
-        db.refresh(new_order)
         
         # Generate order number
-        order_number = f"ORD-{restaurant_id}-{new_order.id:06d}"
+        order_number = f"ORD-{restaurant_id}-{order_id:06d}"
         
         # Calculate estimated pickup time
         estimated_pickup_time = order_request.pick_up_time or "ASAP"
@@ -1264,7 +1215,7 @@ async def place_order(
                 restaurant_id, 
                 POSSystemType.SUPERMENU if restaurant_id == "1" else POSSystemType.CHEERSFOOD
             )
-            pos_order_data.order_id = str(new_order.id)
+            pos_order_data.order_id = str(order_id)
             pos_order_data.order_number = order_number
             
             # Send to all configured POS systems for this restaurant
@@ -1275,7 +1226,7 @@ async def place_order(
                     "enabled": True,
                     "systems": [
                         {
-                            "pos_system": response.pos_system.value,
+                            "pos_system": response.pos_system,
                             "success": response.success,
                             "pos_order_id": response.pos_order_id,
                             "status": response.status.value,
@@ -1318,14 +1269,19 @@ async def place_order(
             restaurant_id=restaurant_id
         )
         
+        # Build confirmation message
+        message = f"Order {order_number} placed successfully!"
+        if order_request.order_type.lower() in PICKUP_ORDER_TYPES:
+            message += f" Estimated pickup time: {estimated_pickup_time}"
+        
         return PlaceOrderResponse(
             success=True,
-            order_id=str(new_order.id),
+            order_id=str(order_id),
             order_number=order_number,
             total_amount=round(total_amount, 2),
             payment_status=payment_status,
             estimated_pickup_time=estimated_pickup_time,
-            message=f"Order {order_number} placed successfully! {f'Estimated pickup time: {estimated_pickup_time}' if order_request.order_type.lower() in ['pickup', 'pick_up', 'pick-up'] else ''}",
+            message=message,
             transaction_id=transaction_id,
             pos_integration=pos_integration_status,
             sms_confirmation=sms_status
@@ -1394,7 +1350,7 @@ async def send_order_confirmation_sms(
             items_text.append(item_line)
         
         # Create SMS message
-        pickup_delivery_text = "pickup" if order_type.lower() in ['pickup', 'pick_up', 'pick-up'] else "delivery"
+        pickup_delivery_text = "pickup" if order_type.lower() in PICKUP_ORDER_TYPES else "delivery"
         
         sms_message = f"""Hi {customer_name}! Your order has been confirmed at {restaurant_name}.
 
@@ -1574,10 +1530,9 @@ async def get_pos_status(restaurant_id: str = Query(..., description="Restaurant
         
         status_info = []
         for integration in integrations:
-            is_configured = integration._is_configured() if hasattr(integration, '_is_configured') else True
             status_info.append({
                 "pos_system": integration.pos_type.value,
-                "configured": is_configured,
+                "configured": integration._configured,
                 "config_keys": list(integration.config.keys()),
                 "has_credentials": bool(integration.config.get('api_key'))
             })
@@ -1638,4 +1593,4 @@ async def startup_event():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=8000, loop="uvloop", http="httptools") 
\ No newline at end of file
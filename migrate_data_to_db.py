@@ -4,216 +4,365 @@ Data migration script to move existing file-based data to database
 Run this script once to populate the database with your existing restaurant data
 """
 
-import json
+import mmap
 import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from database_models import create_tables, SessionLocal, Restaurant, MenuCategory, MenuItem
+import orjson
+from sqlalchemy import event, func, insert, select
+from database_models import create_tables, engine, SessionLocal, Restaurant, MenuCategory, MenuItem
+
+@lru_cache(maxsize=32)
+def _load_json_cached(path_str, mtime_ns):
+    """Parse a JSON file, cached per path and modification time"""
+    with open(path_str, 'rb') as f:
+        return orjson.loads(f.read())
 
 def load_json_file(file_path):
     """Load JSON data from file"""
     try:
-        with open(file_path, 'r') as f:
-            return json.load(f)
-    except Exception as e:
-        print(f"Error loading {file_path}: {e}")
+        return _load_json_cached(str(file_path), os.stat(file_path).st_mtime_ns)
+    except FileNotFoundError:
         return None
 
-def migrate_restaurant_data():
+def load_json_files(file_paths):
+    """Load several JSON files concurrently, returning {path: data}"""
+    file_paths = list(file_paths)
+    if not file_paths:
+        return {}
+    with ThreadPoolExecutor(max_workers=len(file_paths)) as executor:
+        return dict(zip(file_paths, executor.map(load_json_file, file_paths)))
+
+# Menu files are markdown; one compiled pattern recognises every line shape we import,
+# so each file is scanned in a single pass with no per-line Python loop. The patterns are
+# bytes so they can scan a memory-mapped file directly.
+MENU_PATTERN = re.compile(rb"""
+    # "# Starter Menu" / "## Appetizers" headings start a new category, unless an "*ID:" line
+    # follows, which makes the heading an item block
+    (?P<category>^\#{1,2}(?!\#)[ \t]*(?P<category_name>[^*\n]+?)[ \t]*$(?!\n\*ID:))
+    # Item blocks: a "### **Edamame**", "## Spider Hand Roll" or "### Veggie Box - $18.00" heading,
+    # then optional "*ID: 1309*", "*description*" and "(modifier: ...)" lines and the price.
+    # A block without a price heads the "- **Variant**: **$9.95**" lines below it.
+  | (?P<block>^\#{2,3}[ \t]*
+        (?:\*\*(?P<block_name>[^*\n]+?)[ \t]*\*\*[^\n]*
+          | (?P<heading_name>[^*\n]+?)(?:[ \t]+-[ \t]*\$(?P<heading_price>\d+(?:\.\d+)?)[^\n]*)?[ \t]*)\n
+        (?:\*ID:[ \t]*(?P<block_id>\d+)\*[ \t]*\n)?
+        (?:\*(?P<block_description>[^*\n]+)\*[ \t]*\n
+          | (?(heading_price)(?P<heading_description>[^\s*\#|-][^\n]*)))?
+        (?:\([^)\n]*\)[ \t]*\n)?
+        (?:(?:\*\*)?\$(?P<block_price>\d+(?:\.\d+)?)(?:\*\*)?)?)
+    # "- **West Coast**: **$15.00**" variants of the block above, sometimes followed by "*ID: 1332*"
+  | (?P<variant>^-[ \t]*\*\*(?P<variant_name>[^*\n]+?)\*\*:[ \t]*\*\*\$(?P<variant_price>\d+(?:\.\d+)?)\*\*[^\n]*
+        (?:\n\*ID:[ \t]*(?P<variant_id>\d+)\*)?)
+    # "- **A1.** Egg Roll (2) - $3.50  (spicy)" list items
+  | (?P<listed>^-[ \t]*\*\*(?P<listed_id>[A-Z]{0,3}\d+[a-z]?)\.\*\*[ \t]*(?P<listed_name>[^\n]+?)
+        [ \t]*-[ \t]*\$(?P<listed_price>\d+(?:\.\d+)?)[ \t]*(?P<listed_description>[^\n]*)$)
+    # "- **Langostino Hand Roll** - $16.00" list items with indented "*ID: 1353*" / "*description*" lines
+  | (?P<named>^-[ \t]*\*\*(?P<named_name>[^*\n]+?)\*\*[ \t]*-[ \t]*\$(?P<named_price>\d+(?:\.\d+)?)[^\n]*
+        (?:\n[ \t]*\*ID:[ \t]*(?P<named_id>\d+)\*[ \t]*)?
+        (?:\n[ \t]*\*(?P<named_description>[^*\n]+)\*)?)
+    # "| SU1  | Egg Drop Soup | $2.95  | $5.95  |" table rows keyed by item code
+  | (?P<row>^\|[ \t]*(?P<row_id>[A-Z]{0,3}\d+[a-z]?)[ \t]*\|[ \t]*(?P<row_name>[^|\n]+?)[ \t]*\|(?P<row_prices>[^\n]*)$)
+""", re.MULTILINE | re.VERBOSE)
+PRICE_PATTERN = re.compile(rb"\$(\d+(?:\.\d+)?)")
+# Priced lines outside every recognised shape, reported so dropped items do not go unnoticed
+PRICED_LINE_PATTERN = re.compile(rb"^[^\n]*\$\d[^\n]*$", re.MULTILINE)
+
+def parse_menu(menu_text):
+    """Parse UTF-8 menu markdown bytes into [(category_name, [item dicts])], skipping empty categories"""
+    categories = []
+    current_items = None
+    # Name, id and description of the last block without a price, which its variants extend
+    variant_parent = None
+    skipped_lines = []
+    scanned_to = 0
+    for match in MENU_PATTERN.finditer(menu_text):
+        skipped_lines.extend(PRICED_LINE_PATTERN.findall(menu_text, scanned_to, match.start()))
+        scanned_to = match.end()
+        kind = match.lastgroup
+        if kind == "category":
+            current_items = []
+            variant_parent = None
+            categories.append((match["category_name"].decode("utf-8"), current_items))
+            continue
+        if current_items is None:
+            continue
+
+        if kind == "block":
+            item_id = match["block_id"] or b""
+            name = match["block_name"] or match["heading_name"]
+            description = match["block_description"] or match["heading_description"]
+            price = match["block_price"] or match["heading_price"]
+            if price is None:
+                variant_parent = (name.strip(), item_id, description)
+                continue
+            variant_parent = None
+        elif kind == "variant":
+            if variant_parent is None:
+                skipped_lines.append(match[0])
+                continue
+            parent_name, item_id, description = variant_parent
+            name = parent_name + b" (" + match["variant_name"].strip() + b")"
+            item_id = item_id or match["variant_id"] or b""
+            price = match["variant_price"]
+        elif kind == "listed":
+            item_id, name, price = match["listed_id"], match["listed_name"], match["listed_price"]
+            description = match["listed_description"].strip(b" ()")
+        elif kind == "named":
+            item_id, name, price = match["named_id"] or b"", match["named_name"], match["named_price"]
+            description = match["named_description"]
+        else:
+            # Tables list lunch/small before dinner/large; the last price is the regular one
+            prices = PRICE_PATTERN.findall(match["row_prices"])
+            if not prices:
+                continue
+            item_id, name, price = match["row_id"], match["row_name"], prices[-1]
+            description = None
+
+        current_items.append({
+            "item_id": item_id.decode("utf-8"),
+            "name": name.strip().decode("utf-8"),
+            "description": description.strip().decode("utf-8") if description else None,
+            "price": float(price)
+        })
+
+    skipped_lines.extend(PRICED_LINE_PATTERN.findall(menu_text, scanned_to))
+    if skipped_lines:
+        print(f"⚠️ Skipped {len(skipped_lines)} priced lines that are not in a recognised item format:")
+        for line in skipped_lines:
+            print(f"   {line.strip().decode('utf-8', 'replace')}")
+
+    return [(name, items) for name, items in categories if items]
+
+def load_menu_file(menu_file):
+    """Parse an open binary menu file in place through a read-only memory map"""
+    # mmap cannot map an empty file
+    if os.fstat(menu_file.fileno()).st_size == 0:
+        return []
+    with mmap.mmap(menu_file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return parse_menu(mm)
+
+# Restaurants to migrate, with the values used when their info file leaves a field out
+RESTAURANTS = [
+    {
+        "id": 1,
+        "defaults": {
+            "name": "Restaurant 1",
+            "address": "",
+            "phone": "",
+            "website": "",
+            "doordash_link": "",
+            "reservation_link": ""
+        }
+    },
+    {
+        "id": 2,
+        "defaults": {
+            "name": "Umai Nori",
+            "address": "1147 20th Street North West, Washington, DC 20036",
+            "phone": "(202) 262-1073",
+            "website": "www.umainori.com",
+            "doordash_link": "",
+            "reservation_link": ""
+        }
+    }
+]
+
+# INSERT ... ON CONFLICT is dialect specific; both PostgreSQL and SQLite support it
+if engine.dialect.name == "postgresql":
+    from sqlalchemy.dialects.postgresql import insert as dialect_insert
+else:
+    from sqlalchemy.dialects.sqlite import insert as dialect_insert
+
+# Insert statements are built once; SQLAlchemy's compiled cache then reuses their SQL on every execute
+RESTAURANT_INSERT = (
+    dialect_insert(Restaurant)
+    .on_conflict_do_nothing(index_elements=[Restaurant.id])
+    .returning(Restaurant.id)
+)
+MENU_CATEGORY_INSERT = insert(MenuCategory).returning(MenuCategory.id, sort_by_parameter_order=True)
+MENU_ITEM_INSERT = insert(MenuItem)
+
+def configure_sqlite_for_bulk_load(dbapi_connection, connection_record):
+    """Skip the per-commit fsync of the main database file; the migration can be re-run from source files"""
+    dbapi_connection.execute("PRAGMA synchronous=NORMAL")
+
+def migrate_restaurant_data(db):
     """Migrate restaurant data from files to database"""
-    db = SessionLocal()
+    restaurant_ids = [restaurant["id"] for restaurant in RESTAURANTS]
+    restaurant_rows = []
     
-    try:
-        # Create tables if they don't exist
-        create_tables()
-        
-        # Migrate restaurant 1
-        restaurant_1_info_file = Path("data/restaurant_info_1.json")
-        restaurant_1_hours_file = Path("data/store_hours_1.json")
-        
-        if restaurant_1_info_file.exists() and restaurant_1_hours_file.exists():
-            print("Migrating Restaurant 1 data...")
-            
-            # Load restaurant info
-            restaurant_info = load_json_file(restaurant_1_info_file)
-            hours_info = load_json_file(restaurant_1_hours_file)
-            
-            if restaurant_info and hours_info:
-                # Check if restaurant 1 already exists
-                existing_restaurant = db.query(Restaurant).filter(Restaurant.id == 1).first()
-                if not existing_restaurant:
-                    restaurant_1 = Restaurant(
-                        id=1,
-                        name=restaurant_info.get("name", "Restaurant 1"),
-                        address=restaurant_info.get("address", ""),
-                        phone=restaurant_info.get("phone", ""),
-                        website=restaurant_info.get("website", ""),
-                        doordash_link=restaurant_info.get("doordash_link", ""),
-                        reservation_link=restaurant_info.get("reservation_link", ""),
-                        timezone=hours_info.get("timezone", "America/New_York"),
-                        business_hours=hours_info.get("business_hours", {}),
-                        lunch_hours=hours_info.get("lunch_hours", {})
-                    )
-                    db.add(restaurant_1)
-                    print("✅ Restaurant 1 data migrated")
-                else:
-                    print("⚠️ Restaurant 1 already exists in database")
-        
-        # Migrate restaurant 2
-        restaurant_2_info_file = Path("data/restaurant_info_2.json")
-        restaurant_2_hours_file = Path("data/store_hours_2.json")
-        
-        if restaurant_2_info_file.exists() and restaurant_2_hours_file.exists():
-            print("Migrating Restaurant 2 data...")
-            
-            # Load restaurant info
-            restaurant_info = load_json_file(restaurant_2_info_file)
-            hours_info = load_json_file(restaurant_2_hours_file)
-            
-            if restaurant_info and hours_info:
-                # Check if restaurant 2 already exists
-                existing_restaurant = db.query(Restaurant).filter(Restaurant.id == 2).first()
-                if not existing_restaurant:
-                    restaurant_2 = Restaurant(
-                        id=2,
-                        name=restaurant_info.get("name", "Umai Nori"),
-                        address=restaurant_info.get("address", "1147 20th Street North West, Washington, DC 20036"),
-                        phone=restaurant_info.get("phone", "(202) 262-1073"),
-                        website=restaurant_info.get("website", "www.umainori.com"),
-                        doordash_link=restaurant_info.get("doordash_link", ""),
-                        reservation_link=restaurant_info.get("reservation_link", ""),
-                        timezone=hours_info.get("timezone", "America/New_York"),
-                        business_hours=hours_info.get("business_hours", {}),
-                        lunch_hours=hours_info.get("lunch_hours", {})
-                    )
-                    db.add(restaurant_2)
-                    print("✅ Restaurant 2 data migrated")
-                else:
-                    print("⚠️ Restaurant 2 already exists in database")
+    # Read all restaurant files up front so the reads overlap
+    restaurant_files = {
+        restaurant_id: (Path(f"data/restaurant_info_{restaurant_id}.json"),
+                        Path(f"data/store_hours_{restaurant_id}.json"))
+        for restaurant_id in restaurant_ids
+    }
+    loaded_files = load_json_files(path for paths in restaurant_files.values() for path in paths)
+    
+    for restaurant in RESTAURANTS:
+        restaurant_id, defaults = restaurant["id"], restaurant["defaults"]
+        info_file, hours_file = restaurant_files[restaurant_id]
         
-        # Commit all changes
-        db.commit()
-        print("\n✅ Database migration completed successfully!")
+        # Missing files load as None
+        restaurant_info = loaded_files[info_file]
+        hours_info = loaded_files[hours_file]
+        if not (restaurant_info and hours_info):
+            continue
         
-        # Print summary
-        restaurants = db.query(Restaurant).all()
-        print(f"\nDatabase now contains {len(restaurants)} restaurant(s):")
-        for restaurant in restaurants:
-            print(f"- Restaurant {restaurant.id}: {restaurant.name}")
+        restaurant_rows.append({
+            "id": restaurant_id,
+            **{field: restaurant_info.get(field, default) for field, default in defaults.items()},
+            "timezone": hours_info.get("timezone", "America/New_York"),
+            "business_hours": hours_info.get("business_hours", {}),
+            "lunch_hours": hours_info.get("lunch_hours", {})
+        })
     
-    except Exception as e:
-        print(f"❌ Error during migration: {e}")
-        db.rollback()
+    # Insert all restaurants in one statement; the database skips ids that already
+    # exist and only returns the ids it actually inserted
+    inserted_ids = set(db.scalars(RESTAURANT_INSERT, restaurant_rows)) if restaurant_rows else set()
     
-    finally:
-        db.close()
+    for row in restaurant_rows:
+        restaurant_id = row["id"]
+        print(f"Migrating Restaurant {restaurant_id} data...")
+        if restaurant_id in inserted_ids:
+            print(f"✅ Restaurant {restaurant_id} data migrated")
+        else:
+            print(f"⚠️ Restaurant {restaurant_id} already exists in database")
 
-def migrate_menu_data():
+def migrate_menu_data(db):
     """Migrate menu data from text files to database"""
-    db = SessionLocal()
+    print("\nMigrating menu data...")
     
-    try:
-        print("\nMigrating menu data...")
-        
-        # Load menu files
-        menu_1_file = Path("menus/1.txt")
-        menu_2_file = Path("menus/2.txt")
-        
-        if menu_1_file.exists():
-            print("Processing Restaurant 1 menu...")
-            # Note: Menu parsing would need to be implemented based on your menu format
-            # For now, we'll create a placeholder category
-            restaurant_1 = db.query(Restaurant).filter(Restaurant.id == 1).first()
-            if restaurant_1:
-                # Check if menu category already exists
-                existing_category = db.query(MenuCategory).filter(
-                    MenuCategory.restaurant_id == 1,
-                    MenuCategory.name == "Main Menu"
-                ).first()
-                
-                if not existing_category:
-                    menu_category = MenuCategory(
-                        restaurant_id=1,
-                        name="Main Menu",
-                        display_order=1
-                    )
-                    db.add(menu_category)
-                    print("✅ Restaurant 1 menu category created")
+    # Fetch restaurant ids and restaurants that already have a menu with one query each
+    candidate_ids = [restaurant["id"] for restaurant in RESTAURANTS]
+    restaurant_ids = set(db.scalars(select(Restaurant.id).where(Restaurant.id.in_(candidate_ids))).all())
+    restaurants_with_menu = set(db.scalars(
+        select(MenuCategory.restaurant_id).where(MenuCategory.restaurant_id.in_(candidate_ids))
+    ).all())
+    
+    for restaurant_id in candidate_ids:
+        try:
+            menu_file = open(f"menus/{restaurant_id}.txt", 'rb')
+        except FileNotFoundError:
+            continue
         
-        if menu_2_file.exists():
-            print("Processing Restaurant 2 menu...")
-            # Note: Menu parsing would need to be implemented based on your menu format
-            restaurant_2 = db.query(Restaurant).filter(Restaurant.id == 2).first()
-            if restaurant_2:
-                # Check if menu category already exists
-                existing_category = db.query(MenuCategory).filter(
-                    MenuCategory.restaurant_id == 2,
-                    MenuCategory.name == "Main Menu"
-                ).first()
-                
-                if not existing_category:
-                    menu_category = MenuCategory(
-                        restaurant_id=2,
-                        name="Main Menu", 
-                        display_order=1
-                    )
-                    db.add(menu_category)
-                    print("✅ Restaurant 2 menu category created")
+        with menu_file:
+            print(f"Processing Restaurant {restaurant_id} menu...")
+            if restaurant_id not in restaurant_ids:
+                continue
+            if restaurant_id in restaurants_with_menu:
+                print(f"⚠️ Restaurant {restaurant_id} menu already exists in database")
+                continue
+            
+            menu = load_menu_file(menu_file)
+        if not menu:
+            print(f"⚠️ Restaurant {restaurant_id} menu has no items to migrate")
+            continue
         
-        db.commit()
-        print("✅ Menu data migration completed!")
+        # Categories need their ids before items can reference them; a bulk
+        # INSERT ... RETURNING hands them back in row order without building ORM objects
+        category_rows = [
+            {
+                "restaurant_id": restaurant_id,
+                "name": category_name,
+                "display_order": display_order,
+                "is_lunch_only": "lunch" in category_name.lower()
+            }
+            for display_order, (category_name, _) in enumerate(menu, start=1)
+        ]
+        category_ids = db.scalars(MENU_CATEGORY_INSERT, category_rows).all()
         
-    except Exception as e:
-        print(f"❌ Error during menu migration: {e}")
-        db.rollback()
+        item_rows = [
+            {**item, "category_id": category_id}
+            for category_id, (_, items) in zip(category_ids, menu)
+            for item in items
+        ]
+        if item_rows:
+            db.execute(MENU_ITEM_INSERT, item_rows)
+        print(f"✅ Restaurant {restaurant_id} menu migrated: {len(category_rows)} categories, {len(item_rows)} items")
     
-    finally:
-        db.close()
+    print("✅ Menu data migration completed!")
+
+def _verify_snapshot(db):
+    """Read the counts and rows printed by verify_migration"""
+    # One query per table: the row lists give the restaurant and category counts,
+    # and each category row carries its item count
+    restaurants = [
+        (restaurant_id, name, address, phone, timezone, len(business_hours), len(lunch_hours or {}))
+        for restaurant_id, name, address, phone, timezone, business_hours, lunch_hours in db.execute(
+            select(Restaurant.id, Restaurant.name, Restaurant.address, Restaurant.phone,
+                   Restaurant.timezone, Restaurant.business_hours, Restaurant.lunch_hours)
+            .execution_options(yield_per=100)
+        )
+    ]
+    category_rows = db.execute(
+        select(MenuCategory.restaurant_id, MenuCategory.name, func.count(MenuItem.id))
+        .outerjoin(MenuItem, MenuItem.category_id == MenuCategory.id)
+        .group_by(MenuCategory.id)
+        .order_by(MenuCategory.id)
+    ).all()
+    categories = [(restaurant_id, name) for restaurant_id, name, _ in category_rows]
+    item_count = sum(count for _, _, count in category_rows)
+    return len(restaurants), restaurants, len(categories), categories, item_count
 
-def verify_migration():
+def verify_migration(db):
     """Verify the migration was successful"""
-    db = SessionLocal()
+    print("\n" + "="*50)
+    print("MIGRATION VERIFICATION")
+    print("="*50)
     
-    try:
-        print("\n" + "="*50)
-        print("MIGRATION VERIFICATION")
-        print("="*50)
-        
-        # Check restaurants
-        restaurants = db.query(Restaurant).all()
-        print(f"Restaurants in database: {len(restaurants)}")
-        
-        for restaurant in restaurants:
-            print(f"\nRestaurant {restaurant.id}:")
-            print(f"  Name: {restaurant.name}")
-            print(f"  Address: {restaurant.address}")
-            print(f"  Phone: {restaurant.phone}")
-            print(f"  Timezone: {restaurant.timezone}")
-            print(f"  Business Hours: {len(restaurant.business_hours)} days configured")
-            if restaurant.lunch_hours:
-                print(f"  Lunch Hours: {len(restaurant.lunch_hours)} days configured")
-        
-        # Check menu categories
-        categories = db.query(MenuCategory).all()
-        print(f"\nMenu Categories: {len(categories)}")
-        for category in categories:
-            print(f"  Restaurant {category.restaurant_id}: {category.name}")
-        
-        print("\n✅ Migration verification completed!")
-        
-    except Exception as e:
-        print(f"❌ Error during verification: {e}")
+    restaurant_count, restaurants, category_count, categories, item_count = _verify_snapshot(db)
+    
+    # Check restaurants
+    print(f"Restaurants in database: {restaurant_count}")
+    
+    for restaurant_id, name, address, phone, timezone, business_days, lunch_days in restaurants:
+        print(f"\nRestaurant {restaurant_id}:")
+        print(f"  Name: {name}")
+        print(f"  Address: {address}")
+        print(f"  Phone: {phone}")
+        print(f"  Timezone: {timezone}")
+        print(f"  Business Hours: {business_days} days configured")
+        if lunch_days:
+            print(f"  Lunch Hours: {lunch_days} days configured")
+    
+    # Check menu categories and items
+    print(f"\nMenu Categories: {category_count}")
+    for restaurant_id, category_name in categories:
+        print(f"  Restaurant {restaurant_id}: {category_name}")
     
-    finally:
-        db.close()
+    print(f"Menu Items: {item_count}")
+    
+    print("\n✅ Migration verification completed!")
 
 if __name__ == "__main__":
     print("🚀 Starting data migration to database...")
     print("This will move your existing restaurant data from files to SQLite database")
     
-    # Run migrations
-    migrate_restaurant_data()
-    migrate_menu_data()
-    verify_migration()
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", configure_sqlite_for_bulk_load)
+    
+    # Create tables if they don't exist
+    create_tables()
+    
+    # Run all phases in one session and one transaction, so the whole migration
+    # is committed (or rolled back) together; clear the identity map between phases.
+    # Autoflush is already off on SessionLocal; keep attributes loaded after commit.
+    try:
+        with SessionLocal(expire_on_commit=False) as db, db.begin():
+            migrate_restaurant_data(db)
+            db.expunge_all()
+            migrate_menu_data(db)
+            db.expunge_all()
+            verify_migration(db)
+    except Exception as e:
+        print(f"❌ Error during migration, no changes were saved: {e}")
+        raise SystemExit(1)
+    
+    print("\n✅ Database migration completed successfully!")
     
     print("\n" + "="*50)
     print("NEXT STEPS:")
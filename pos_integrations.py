@@ -5,15 +5,33 @@ Supports multiple POS systems with scalable architecture
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional, List
-from pydantic import BaseModel
+from dataclasses import dataclass, field, asdict
+from typing import Dict, Any, Optional, List, Tuple, Literal, Callable
+from pydantic import BaseModel, TypeAdapter
 from enum import Enum
 import logging
 import asyncio
-from datetime import datetime
+import os
+import random
+import time
+from datetime import datetime, timedelta
+import httpx
+import orjson
+import pytz
 
 logger = logging.getLogger(__name__)
 
+POS_HTTP_TIMEOUT = httpx.Timeout(10.0)
+
+# Retries for transient POS API failures (connection errors and 5xx responses)
+POS_RETRY_ATTEMPTS = max(1, int(os.getenv("POS_RETRY_ATTEMPTS", "3")))
+POS_RETRY_INITIAL_DELAY = 0.1
+POS_RETRY_MAX_DELAY = 2.0
+# Methods safe to resend after the POS may already have acted on the request. Other methods
+# (POST /orders, DELETE /orders/{id}) only retry when the connection failed before the request
+# was sent; a resent cancel can fail on an order the first attempt already removed.
+POS_IDEMPOTENT_METHODS = frozenset({"GET", "PUT"})
+
 class POSSystemType(Enum):
     """Supported POS system types"""
     SUPERMENU = "supermenu"
@@ -23,6 +41,10 @@ class POSSystemType(Enum):
     # TOAST = "toast"
     # RESY = "resy"
 
+# POSSystemType values as carried on the models; a Literal validates as a plain string compare.
+# Built from the enum so a new POS system only needs adding there.
+POSSystemName = Literal[tuple(pos_type.value for pos_type in POSSystemType)]
+
 class OrderStatus(Enum):
     """Standard order status across all POS systems"""
     PENDING = "pending"
@@ -33,42 +55,248 @@ class OrderStatus(Enum):
     DELIVERED = "delivered"
     CANCELLED = "cancelled"
 
+# Fixed-layout parts of an order; formatters read attributes instead of dict keys
+@dataclass(slots=True)
+class CustomerInfo:
+    """Customer details sent with a POS order"""
+    phone: str = ""
+    name: Optional[str] = None
+    address: str = ""
+
+@dataclass(slots=True)
+class OrderItem:
+    """A single ordered item"""
+    item_name: str
+    item_quantity: int
+    item_base_price: float
+    item_id: Optional[str] = None
+    special_instructions: str = ""
+    modifiers: List[Dict[str, Any]] = field(default_factory=list)
+
+@dataclass(slots=True)
+class Pricing:
+    """Order totals"""
+    subtotal: float = 0.0
+    tax_amount: float = 0.0
+    total_amount: float = 0.0
+    tax_rate: float = 0.0
+    delivery_fee: float = 0.0
+    tip_amount: float = 0.0
+
+@dataclass(slots=True)
+class PaymentInfo:
+    """Payment method and outcome"""
+    payment_type: str = ""
+    payment_status: str = ""
+    transaction_id: Optional[str] = None
+
 class POSOrderData(BaseModel):
     """Standardized order data format for POS systems"""
     order_id: str
     order_number: str
     restaurant_id: str
-    customer_info: Dict[str, Any]
-    order_items: List[Dict[str, Any]]
+    customer_info: CustomerInfo
+    order_items: List[OrderItem]
     order_type: str  # pickup, delivery, dine_in
     pickup_time: Optional[str] = None
     special_instructions: Optional[str] = None
-    pricing: Dict[str, float]
-    payment_info: Dict[str, Any]
-    pos_system: POSSystemType
+    pricing: Pricing
+    payment_info: PaymentInfo
+    pos_system: POSSystemName
 
 class POSResponse(BaseModel):
     """Standard response from POS operations"""
+    # Integrations build these from trusted values with model_construct(), skipping validation
     success: bool
     pos_order_id: Optional[str] = None
     status: OrderStatus
     message: str
     error_details: Optional[str] = None
     estimated_ready_time: Optional[str] = None
-    pos_system: POSSystemType
+    pos_system: POSSystemName
+
+def _has_credentials(config: Dict[str, Any]) -> bool:
+    """Check if the POS credentials are configured"""
+    return bool(config.get('api_key') and config.get('api_url') and config.get('restaurant_id'))
+
+# Restaurants run on Eastern time; build the tzinfo once rather than per order
+EASTERN_TZ = pytz.timezone('America/New_York')
+
+# The default ready time only has minute precision, so it is reused for a few seconds
+READY_TIME_CACHE_TTL_SECONDS = 10
+_READY_TIME_CACHE: Dict[str, Tuple[str, float]] = {}
+
+def _default_ready_time() -> str:
+    """Return the time 25 minutes from now, cached briefly"""
+    cached = _READY_TIME_CACHE.get("default")
+    if cached and cached[1] > time.monotonic():
+        return cached[0]
+    
+    ready_time = (datetime.now(EASTERN_TZ) + timedelta(minutes=25)).strftime("%I:%M %p")
+    _READY_TIME_CACHE["default"] = (ready_time, time.monotonic() + READY_TIME_CACHE_TTL_SECONDS)
+    return ready_time
+
+def _calculate_ready_time(order_data: POSOrderData) -> str:
+    """Calculate estimated ready time"""
+    if order_data.pickup_time and order_data.pickup_time.lower() not in ["asap", ""]:
+        return order_data.pickup_time
+    
+    # Default to 25 minutes from now
+    return _default_ready_time()
+
+def _format_supermenu_order_impl(order_data: POSOrderData) -> Dict[str, Any]:
+    """Format order for SuperMenu API"""
+    # This will be implemented when SuperMenu API documentation is available
+    customer = order_data.customer_info
+    pricing = order_data.pricing
+    payment = order_data.payment_info
+    return {
+        "orderNumber": order_data.order_number,
+        "customerId": customer.phone,
+        "customerName": customer.name,
+        "orderType": order_data.order_type.upper(),
+        "items": [
+            {
+                "itemId": item.item_id or item.item_name,
+                "itemName": item.item_name,
+                "quantity": item.item_quantity,
+                "price": item.item_base_price,
+                "modifiers": item.modifiers,
+                "specialInstructions": item.special_instructions
+            }
+            for item in order_data.order_items
+        ],
+        "pricing": {
+            "subtotal": pricing.subtotal,
+            "tax": pricing.tax_amount,
+            "total": pricing.total_amount,
+            "deliveryFee": pricing.delivery_fee,
+            "tip": pricing.tip_amount
+        },
+        "payment": {
+            "type": payment.payment_type,
+            "status": payment.payment_status
+        },
+        "specialInstructions": order_data.special_instructions,
+        "requestedTime": order_data.pickup_time
+    }
+
+def _format_cheersfood_order_impl(order_data: POSOrderData) -> Dict[str, Any]:
+    """Format order for CheersFood API"""
+    # This will be implemented when CheersFood API documentation is available
+    customer = order_data.customer_info
+    pricing = order_data.pricing
+    return {
+        "order_id": order_data.order_number,
+        "customer": {
+            "phone": customer.phone,
+            "name": customer.name,
+            "address": customer.address
+        },
+        "order_type": order_data.order_type,
+        "items": [
+            {
+                "name": item.item_name,
+                "qty": item.item_quantity,
+                "price": item.item_base_price,
+                "mods": item.modifiers,
+                "notes": item.special_instructions
+            }
+            for item in order_data.order_items
+        ],
+        "totals": {
+            "subtotal": pricing.subtotal,
+            "tax": pricing.tax_amount,
+            "total": pricing.total_amount
+        },
+        "payment_info": asdict(order_data.payment_info),
+        "notes": order_data.special_instructions,
+        "pickup_time": order_data.pickup_time
+    }
+
+@dataclass(frozen=True, slots=True)
+class POSVendor:
+    """Everything that differs between POS vendors"""
+    pos_type: POSSystemType
+    tag: str  # Used in log messages and replies
+    id_prefix: str  # Prefix for POS order ids
+    format_order: Callable[[POSOrderData], Dict[str, Any]]
+
+SUPERMENU_VENDOR = POSVendor(
+    pos_type=POSSystemType.SUPERMENU,
+    tag="SuperMenu",
+    id_prefix="SM",
+    format_order=_format_supermenu_order_impl
+)
+
+CHEERSFOOD_VENDOR = POSVendor(
+    pos_type=POSSystemType.CHEERSFOOD,
+    tag="CheersFood",
+    id_prefix="CF",
+    format_order=_format_cheersfood_order_impl
+)
+
+# New POS systems are added here
+POS_VENDORS: Dict[POSSystemType, POSVendor] = {
+    POSSystemType.SUPERMENU: SUPERMENU_VENDOR,
+    POSSystemType.CHEERSFOOD: CHEERSFOOD_VENDOR
+}
 
 class BasePOSIntegration(ABC):
     """Abstract base class for all POS integrations"""
     
-    def __init__(self, restaurant_id: str, config: Dict[str, Any]):
+    def __init__(self, restaurant_id: str, config: Dict[str, Any], vendor: POSVendor):
         self.restaurant_id = restaurant_id
         self.config = config
-        self.pos_type = self._get_pos_type()
-    
-    @abstractmethod
-    def _get_pos_type(self) -> POSSystemType:
-        """Return the POS system type"""
-        pass
+        self.vendor = vendor
+        # The POS system comes from the vendor record; log tags are read from self.vendor.tag
+        self.pos_type = vendor.pos_type
+        self.pos_system = vendor.pos_type.value
+        # Configuration does not change after registration, so check the credentials once
+        self._configured = _has_credentials(config)
+    
+    def _auth_headers(self) -> Dict[str, str]:
+        """Return the authentication headers for the POS API"""
+        return {"Authorization": f"Bearer {self.config['api_key']}"}
+    
+    async def _call_api(self, method: str, path: str, body: Optional[Dict[str, Any]] = None) -> httpx.Response:
+        """Call the POS API, retrying transient failures over one connection"""
+        # Serialize the body once with orjson; retries resend the same bytes
+        headers = self._auth_headers()
+        content = None
+        if body is not None:
+            content = orjson.dumps(body)
+            headers["Content-Type"] = "application/json"
+        idempotent = method.upper() in POS_IDEMPOTENT_METHODS
+        async with httpx.AsyncClient(timeout=POS_HTTP_TIMEOUT) as client:
+            for attempt in range(1, POS_RETRY_ATTEMPTS + 1):
+                try:
+                    response = await client.request(
+                        method,
+                        self.config['api_url'] + path,
+                        content=content,
+                        headers=headers
+                    )
+                    response.raise_for_status()
+                    return response
+                except httpx.HTTPStatusError as e:
+                    # Client errors will not succeed on retry, and a 5xx may come after the POS
+                    # accepted a non-idempotent request; fail fast
+                    if e.response.status_code < 500 or not idempotent or attempt == POS_RETRY_ATTEMPTS:
+                        raise
+                except (httpx.ConnectError, httpx.ConnectTimeout):
+                    # The request never reached the POS, so any method can be resent
+                    if attempt == POS_RETRY_ATTEMPTS:
+                        raise
+                except httpx.TransportError:
+                    # A read timeout or dropped connection may follow an order the POS already took
+                    if not idempotent or attempt == POS_RETRY_ATTEMPTS:
+                        raise
+                
+                # Exponential backoff with full jitter
+                delay = random.uniform(0, min(POS_RETRY_MAX_DELAY, POS_RETRY_INITIAL_DELAY * 2 ** (attempt - 1)))
+                logger.warning("[%s] %s %s failed (attempt %s), retrying in %.2fs", self.vendor.tag, method, path, attempt, delay)
+                await asyncio.sleep(delay)
     
     @abstractmethod
     async def send_order(self, order_data: POSOrderData) -> POSResponse:
@@ -97,516 +325,225 @@ class BasePOSIntegration(ABC):
     
     def format_order_for_pos(self, order_data: POSOrderData) -> Dict[str, Any]:
         """Convert standardized order data to POS-specific format"""
-        # Default implementation - can be overridden by specific POS classes
-        return {
-            "order_id": order_data.order_id,
-            "order_number": order_data.order_number,
-            "customer": order_data.customer_info,
-            "items": order_data.order_items,
-            "order_type": order_data.order_type,
-            "pickup_time": order_data.pickup_time,
-            "instructions": order_data.special_instructions,
-            "pricing": order_data.pricing,
-            "payment": order_data.payment_info
-        }
+        return self.vendor.format_order(order_data)
 
-class SuperMenuPOSIntegration(BasePOSIntegration):
-    """SuperMenu POS system integration"""
-    
-    def _get_pos_type(self) -> POSSystemType:
-        return POSSystemType.SUPERMENU
+class GenericPOSIntegration(BasePOSIntegration):
+    """POS system integration driven by its POSVendor record"""
     
     async def send_order(self, order_data: POSOrderData) -> POSResponse:
-        """Send order to SuperMenu POS"""
+        """Send order to the POS"""
         try:
-            logger.info(f"[SuperMenu] Sending order {order_data.order_number} to SuperMenu POS")
-            
-            # TODO: Replace with actual SuperMenu API call when credentials are available
-            if not self._is_configured():
-                return self._create_mock_response(order_data, "SuperMenu POS not configured yet")
+            logger.info("[%s] Sending order %s to %s POS", self.vendor.tag, order_data.order_number, self.vendor.tag)
             
             # Future implementation:
-            # supermenu_order = self._format_supermenu_order(order_data)
-            # response = await self._call_supermenu_api("POST", "/orders", supermenu_order)
+            # vendor_order = self.format_order_for_pos(order_data)
+            # response = await self._call_api("POST", "/orders", vendor_order)
             
             # Mock successful response for now
-            return POSResponse(
+            return POSResponse.model_construct(
                 success=True,
-                pos_order_id=f"SM_{order_data.order_id}",
+                pos_order_id=f"{self.vendor.id_prefix}_{order_data.order_id}",
                 status=OrderStatus.CONFIRMED,
-                message="Order sent to SuperMenu POS successfully",
-                estimated_ready_time=self._calculate_ready_time(order_data),
-                pos_system=POSSystemType.SUPERMENU
+                message=f"Order sent to {self.vendor.tag} POS successfully",
+                estimated_ready_time=_calculate_ready_time(order_data),
+                pos_system=self.pos_system
             )
             
         except Exception as e:
-            logger.error(f"[SuperMenu] Error sending order: {str(e)}")
-            return POSResponse(
+            logger.exception("[%s] Error sending order", self.vendor.tag)
+            return POSResponse.model_construct(
                 success=False,
                 status=OrderStatus.PENDING,
-                message="Failed to send order to SuperMenu POS",
+                message=f"Failed to send order to {self.vendor.tag} POS",
                 error_details=str(e),
-                pos_system=POSSystemType.SUPERMENU
+                pos_system=self.pos_system
             )
     
     async def get_order_status(self, pos_order_id: str) -> POSResponse:
-        """Get order status from SuperMenu"""
+        """Get order status from the POS"""
         try:
-            logger.info(f"[SuperMenu] Getting status for order {pos_order_id}")
-            
-            if not self._is_configured():
-                return self._create_mock_status_response(pos_order_id)
+            logger.info("[%s] Getting status for order %s", self.vendor.tag, pos_order_id)
             
             # Future implementation:
-            # response = await self._call_supermenu_api("GET", f"/orders/{pos_order_id}")
+            # response = await self._call_api("GET", f"/orders/{pos_order_id}")
             
-            return POSResponse(
+            return POSResponse.model_construct(
                 success=True,
                 pos_order_id=pos_order_id,
                 status=OrderStatus.PREPARING,
                 message="Order is being prepared",
-                pos_system=POSSystemType.SUPERMENU
+                pos_system=self.pos_system
             )
             
         except Exception as e:
-            logger.error(f"[SuperMenu] Error getting order status: {str(e)}")
-            return POSResponse(
+            logger.exception("[%s] Error getting order status", self.vendor.tag)
+            return POSResponse.model_construct(
                 success=False,
                 status=OrderStatus.PENDING,
-                message="Failed to get order status from SuperMenu",
+                message=f"Failed to get order status from {self.vendor.tag}",
                 error_details=str(e),
-                pos_system=POSSystemType.SUPERMENU
+                pos_system=self.pos_system
             )
     
     async def cancel_order(self, pos_order_id: str) -> POSResponse:
-        """Cancel order in SuperMenu"""
+        """Cancel order in the POS"""
         try:
-            logger.info(f"[SuperMenu] Cancelling order {pos_order_id}")
-            
-            if not self._is_configured():
-                return POSResponse(
-                    success=True,
-                    pos_order_id=pos_order_id,
-                    status=OrderStatus.CANCELLED,
-                    message="Order cancelled (SuperMenu not configured)",
-                    pos_system=POSSystemType.SUPERMENU
-                )
+            logger.info("[%s] Cancelling order %s", self.vendor.tag, pos_order_id)
             
             # Future implementation:
-            # response = await self._call_supermenu_api("DELETE", f"/orders/{pos_order_id}")
+            # response = await self._call_api("DELETE", f"/orders/{pos_order_id}")
             
-            return POSResponse(
+            return POSResponse.model_construct(
                 success=True,
                 pos_order_id=pos_order_id,
                 status=OrderStatus.CANCELLED,
                 message="Order cancelled successfully",
-                pos_system=POSSystemType.SUPERMENU
+                pos_system=self.pos_system
             )
             
         except Exception as e:
-            logger.error(f"[SuperMenu] Error cancelling order: {str(e)}")
-            return POSResponse(
+            logger.exception("[%s] Error cancelling order", self.vendor.tag)
+            return POSResponse.model_construct(
                 success=False,
                 status=OrderStatus.PENDING,
-                message="Failed to cancel order in SuperMenu",
+                message=f"Failed to cancel order in {self.vendor.tag}",
                 error_details=str(e),
-                pos_system=POSSystemType.SUPERMENU
+                pos_system=self.pos_system
             )
     
     async def update_order(self, pos_order_id: str, updates: Dict[str, Any]) -> POSResponse:
-        """Update order in SuperMenu"""
+        """Update order in the POS"""
         try:
-            logger.info(f"[SuperMenu] Updating order {pos_order_id}")
-            
-            if not self._is_configured():
-                return POSResponse(
-                    success=True,
-                    pos_order_id=pos_order_id,
-                    status=OrderStatus.CONFIRMED,
-                    message="Order updated (SuperMenu not configured)",
-                    pos_system=POSSystemType.SUPERMENU
-                )
+            logger.info("[%s] Updating order %s", self.vendor.tag, pos_order_id)
             
             # Future implementation:
-            # response = await self._call_supermenu_api("PUT", f"/orders/{pos_order_id}", updates)
+            # response = await self._call_api("PUT", f"/orders/{pos_order_id}", updates)
             
-            return POSResponse(
+            return POSResponse.model_construct(
                 success=True,
                 pos_order_id=pos_order_id,
                 status=OrderStatus.CONFIRMED,
                 message="Order updated successfully",
-                pos_system=POSSystemType.SUPERMENU
+                pos_system=self.pos_system
             )
             
         except Exception as e:
-            logger.error(f"[SuperMenu] Error updating order: {str(e)}")
-            return POSResponse(
+            logger.exception("[%s] Error updating order", self.vendor.tag)
+            return POSResponse.model_construct(
                 success=False,
                 status=OrderStatus.PENDING,
-                message="Failed to update order in SuperMenu",
+                message=f"Failed to update order in {self.vendor.tag}",
                 error_details=str(e),
-                pos_system=POSSystemType.SUPERMENU
+                pos_system=self.pos_system
             )
     
     async def test_connection(self) -> bool:
-        """Test connection to SuperMenu"""
+        """Test connection to the POS"""
         try:
-            if not self._is_configured():
-                logger.warning("[SuperMenu] SuperMenu POS not configured")
-                return False
-            
             # Future implementation:
-            # response = await self._call_supermenu_api("GET", "/health")
+            # response = await self._call_api("GET", "/health")
             # return response.status_code == 200
             
             return True
             
-        except Exception as e:
-            logger.error(f"[SuperMenu] Connection test failed: {str(e)}")
+        except Exception:
+            logger.exception("[%s] Connection test failed", self.vendor.tag)
             return False
+
+class NullPOSIntegration(BasePOSIntegration):
+    """Stand-in for a POS system whose credentials are not configured yet"""
     
-    def _is_configured(self) -> bool:
-        """Check if SuperMenu credentials are configured"""
-        required_keys = ['api_key', 'api_url', 'restaurant_id']
-        return all(key in self.config and self.config[key] for key in required_keys)
-    
-    def _format_supermenu_order(self, order_data: POSOrderData) -> Dict[str, Any]:
-        """Format order for SuperMenu API"""
-        # This will be implemented when SuperMenu API documentation is available
-        base_order = self.format_order_for_pos(order_data)
-        
-        # SuperMenu-specific formatting
-        supermenu_order = {
-            "orderNumber": base_order["order_number"],
-            "customerId": base_order["customer"]["phone"],
-            "customerName": base_order["customer"]["name"],
-            "orderType": base_order["order_type"].upper(),
-            "items": [
-                {
-                    "itemId": item.get("item_id", item["item_name"]),
-                    "itemName": item["item_name"],
-                    "quantity": item["item_quantity"],
-                    "price": item["item_base_price"],
-                    "modifiers": item.get("modifiers", []),
-                    "specialInstructions": item.get("special_instructions", "")
-                }
-                for item in base_order["items"]
-            ],
-            "pricing": {
-                "subtotal": base_order["pricing"]["subtotal"],
-                "tax": base_order["pricing"]["tax_amount"],
-                "total": base_order["pricing"]["total_amount"],
-                "deliveryFee": base_order["pricing"].get("delivery_fee", 0),
-                "tip": base_order["pricing"].get("tip_amount", 0)
-            },
-            "payment": {
-                "type": base_order["payment"]["payment_type"],
-                "status": base_order["payment"]["payment_status"]
-            },
-            "specialInstructions": base_order["instructions"],
-            "requestedTime": base_order["pickup_time"]
-        }
+    def __init__(self, restaurant_id: str, config: Dict[str, Any], vendor: POSVendor):
+        # Reports as the POS system it stands in for
+        super().__init__(restaurant_id, config, vendor)
+        self._mock_id_prefix = f"MOCK_{vendor.id_prefix}_"
         
-        return supermenu_order
-    
-    def _create_mock_response(self, order_data: POSOrderData, message: str) -> POSResponse:
-        """Create a mock response when POS is not configured"""
-        return POSResponse(
+        # Every reply is a fixed template that only needs its order fields filled in per call
+        self._order_template = POSResponse.model_construct(
             success=True,
-            pos_order_id=f"MOCK_SM_{order_data.order_id}",
             status=OrderStatus.CONFIRMED,
-            message=f"{message} - Mock confirmation generated",
-            estimated_ready_time=self._calculate_ready_time(order_data),
-            pos_system=POSSystemType.SUPERMENU
+            message=f"{self.vendor.tag} POS not configured yet - Mock confirmation generated",
+            pos_system=self.pos_system
         )
-    
-    def _create_mock_status_response(self, pos_order_id: str) -> POSResponse:
-        """Create a mock status response"""
-        return POSResponse(
+        self._status_template = POSResponse.model_construct(
             success=True,
-            pos_order_id=pos_order_id,
             status=OrderStatus.PREPARING,
             message="Order is being prepared (mock status)",
-            pos_system=POSSystemType.SUPERMENU
+            pos_system=self.pos_system
+        )
+        self._cancel_template = POSResponse.model_construct(
+            success=True,
+            status=OrderStatus.CANCELLED,
+            message=f"Order cancelled ({self.vendor.tag} not configured)",
+            pos_system=self.pos_system
+        )
+        self._update_template = POSResponse.model_construct(
+            success=True,
+            status=OrderStatus.CONFIRMED,
+            message=f"Order updated ({self.vendor.tag} not configured)",
+            pos_system=self.pos_system
         )
-    
-    def _calculate_ready_time(self, order_data: POSOrderData) -> str:
-        """Calculate estimated ready time"""
-        from datetime import datetime, timedelta
-        import pytz
-        
-        eastern = pytz.timezone('America/New_York')
-        
-        if order_data.pickup_time and order_data.pickup_time.lower() not in ["asap", ""]:
-            return order_data.pickup_time
-        
-        # Default to 25 minutes from now
-        ready_time = datetime.now(eastern) + timedelta(minutes=25)
-        return ready_time.strftime("%I:%M %p")
-
-class CheersFoodPOSIntegration(BasePOSIntegration):
-    """CheersFood POS system integration"""
-    
-    def _get_pos_type(self) -> POSSystemType:
-        return POSSystemType.CHEERSFOOD
     
     async def send_order(self, order_data: POSOrderData) -> POSResponse:
-        """Send order to CheersFood POS"""
-        try:
-            logger.info(f"[CheersFood] Sending order {order_data.order_number} to CheersFood POS")
-            
-            if not self._is_configured():
-                return self._create_mock_response(order_data, "CheersFood POS not configured yet")
-            
-            # Future implementation:
-            # cheersfood_order = self._format_cheersfood_order(order_data)
-            # response = await self._call_cheersfood_api("POST", "/orders", cheersfood_order)
-            
-            return POSResponse(
-                success=True,
-                pos_order_id=f"CF_{order_data.order_id}",
-                status=OrderStatus.CONFIRMED,
-                message="Order sent to CheersFood POS successfully",
-                estimated_ready_time=self._calculate_ready_time(order_data),
-                pos_system=POSSystemType.CHEERSFOOD
-            )
-            
-        except Exception as e:
-            logger.error(f"[CheersFood] Error sending order: {str(e)}")
-            return POSResponse(
-                success=False,
-                status=OrderStatus.PENDING,
-                message="Failed to send order to CheersFood POS",
-                error_details=str(e),
-                pos_system=POSSystemType.CHEERSFOOD
-            )
+        """Return a mock confirmation"""
+        logger.info("[%s] Sending order %s to unconfigured %s POS", self.vendor.tag, order_data.order_number, self.vendor.tag)
+        return self._order_template.model_copy(update={
+            "pos_order_id": f"{self._mock_id_prefix}{order_data.order_id}",
+            "estimated_ready_time": _calculate_ready_time(order_data)
+        })
     
     async def get_order_status(self, pos_order_id: str) -> POSResponse:
-        """Get order status from CheersFood"""
-        try:
-            logger.info(f"[CheersFood] Getting status for order {pos_order_id}")
-            
-            if not self._is_configured():
-                return self._create_mock_status_response(pos_order_id)
-            
-            # Future implementation:
-            # response = await self._call_cheersfood_api("GET", f"/orders/{pos_order_id}")
-            
-            return POSResponse(
-                success=True,
-                pos_order_id=pos_order_id,
-                status=OrderStatus.PREPARING,
-                message="Order is being prepared",
-                pos_system=POSSystemType.CHEERSFOOD
-            )
-            
-        except Exception as e:
-            logger.error(f"[CheersFood] Error getting order status: {str(e)}")
-            return POSResponse(
-                success=False,
-                status=OrderStatus.PENDING,
-                message="Failed to get order status from CheersFood",
-                error_details=str(e),
-                pos_system=POSSystemType.CHEERSFOOD
-            )
+        """Return a mock status"""
+        return self._status_template.model_copy(update={"pos_order_id": pos_order_id})
     
     async def cancel_order(self, pos_order_id: str) -> POSResponse:
-        """Cancel order in CheersFood"""
-        try:
-            logger.info(f"[CheersFood] Cancelling order {pos_order_id}")
-            
-            if not self._is_configured():
-                return POSResponse(
-                    success=True,
-                    pos_order_id=pos_order_id,
-                    status=OrderStatus.CANCELLED,
-                    message="Order cancelled (CheersFood not configured)",
-                    pos_system=POSSystemType.CHEERSFOOD
-                )
-            
-            # Future implementation:
-            # response = await self._call_cheersfood_api("DELETE", f"/orders/{pos_order_id}")
-            
-            return POSResponse(
-                success=True,
-                pos_order_id=pos_order_id,
-                status=OrderStatus.CANCELLED,
-                message="Order cancelled successfully",
-                pos_system=POSSystemType.CHEERSFOOD
-            )
-            
-        except Exception as e:
-            logger.error(f"[CheersFood] Error cancelling order: {str(e)}")
-            return POSResponse(
-                success=False,
-                status=OrderStatus.PENDING,
-                message="Failed to cancel order in CheersFood",
-                error_details=str(e),
-                pos_system=POSSystemType.CHEERSFOOD
-            )
+        """Return a mock cancellation"""
+        return self._cancel_template.model_copy(update={"pos_order_id": pos_order_id})
     
     async def update_order(self, pos_order_id: str, updates: Dict[str, Any]) -> POSResponse:
-        """Update order in CheersFood"""
-        try:
-            logger.info(f"[CheersFood] Updating order {pos_order_id}")
-            
-            if not self._is_configured():
-                return POSResponse(
-                    success=True,
-                    pos_order_id=pos_order_id,
-                    status=OrderStatus.CONFIRMED,
-                    message="Order updated (CheersFood not configured)",
-                    pos_system=POSSystemType.CHEERSFOOD
-                )
-            
-            # Future implementation:
-            # response = await self._call_cheersfood_api("PUT", f"/orders/{pos_order_id}", updates)
-            
-            return POSResponse(
-                success=True,
-                pos_order_id=pos_order_id,
-                status=OrderStatus.CONFIRMED,
-                message="Order updated successfully",
-                pos_system=POSSystemType.CHEERSFOOD
-            )
-            
-        except Exception as e:
-            logger.error(f"[CheersFood] Error updating order: {str(e)}")
-            return POSResponse(
-                success=False,
-                status=OrderStatus.PENDING,
-                message="Failed to update order in CheersFood",
-                error_details=str(e),
-                pos_system=POSSystemType.CHEERSFOOD
-            )
+        """Return a mock update"""
+        return self._update_template.model_copy(update={"pos_order_id": pos_order_id})
     
     async def test_connection(self) -> bool:
-        """Test connection to CheersFood"""
-        try:
-            if not self._is_configured():
-                logger.warning("[CheersFood] CheersFood POS not configured")
-                return False
-            
-            # Future implementation:
-            # response = await self._call_cheersfood_api("GET", "/health")
-            # return response.status_code == 200
-            
-            return True
-            
-        except Exception as e:
-            logger.error(f"[CheersFood] Connection test failed: {str(e)}")
-            return False
-    
-    def _is_configured(self) -> bool:
-        """Check if CheersFood credentials are configured"""
-        required_keys = ['api_key', 'api_url', 'restaurant_id']
-        return all(key in self.config and self.config[key] for key in required_keys)
-    
-    def _format_cheersfood_order(self, order_data: POSOrderData) -> Dict[str, Any]:
-        """Format order for CheersFood API"""
-        # This will be implemented when CheersFood API documentation is available
-        base_order = self.format_order_for_pos(order_data)
-        
-        # CheersFood-specific formatting
-        cheersfood_order = {
-            "order_id": base_order["order_number"],
-            "customer": {
-                "phone": base_order["customer"]["phone"],
-                "name": base_order["customer"]["name"],
-                "address": base_order["customer"].get("address", "")
-            },
-            "order_type": base_order["order_type"],
-            "items": [
-                {
-                    "name": item["item_name"],
-                    "qty": item["item_quantity"],
-                    "price": item["item_base_price"],
-                    "mods": item.get("modifiers", []),
-                    "notes": item.get("special_instructions", "")
-                }
-                for item in base_order["items"]
-            ],
-            "totals": {
-                "subtotal": base_order["pricing"]["subtotal"],
-                "tax": base_order["pricing"]["tax_amount"],
-                "total": base_order["pricing"]["total_amount"]
-            },
-            "payment_info": base_order["payment"],
-            "notes": base_order["instructions"],
-            "pickup_time": base_order["pickup_time"]
-        }
-        
-        return cheersfood_order
-    
-    def _create_mock_response(self, order_data: POSOrderData, message: str) -> POSResponse:
-        """Create a mock response when POS is not configured"""
-        return POSResponse(
-            success=True,
-            pos_order_id=f"MOCK_CF_{order_data.order_id}",
-            status=OrderStatus.CONFIRMED,
-            message=f"{message} - Mock confirmation generated",
-            estimated_ready_time=self._calculate_ready_time(order_data),
-            pos_system=POSSystemType.CHEERSFOOD
-        )
-    
-    def _create_mock_status_response(self, pos_order_id: str) -> POSResponse:
-        """Create a mock status response"""
-        return POSResponse(
-            success=True,
-            pos_order_id=pos_order_id,
-            status=OrderStatus.PREPARING,
-            message="Order is being prepared (mock status)",
-            pos_system=POSSystemType.CHEERSFOOD
-        )
-    
-    def _calculate_ready_time(self, order_data: POSOrderData) -> str:
-        """Calculate estimated ready time"""
-        from datetime import datetime, timedelta
-        import pytz
-        
-        eastern = pytz.timezone('America/New_York')
-        
-        if order_data.pickup_time and order_data.pickup_time.lower() not in ["asap", ""]:
-            return order_data.pickup_time
-        
-        # Default to 25 minutes from now
-        ready_time = datetime.now(eastern) + timedelta(minutes=25)
-        return ready_time.strftime("%I:%M %p")
+        """An unconfigured POS is never connected"""
+        logger.warning("[%s] %s POS not configured", self.vendor.tag, self.vendor.tag)
+        return False
 
 class POSManager:
     """Central manager for all POS integrations"""
     
     def __init__(self):
-        self.pos_integrations: Dict[str, Dict[POSSystemType, BasePOSIntegration]] = {}
-        self.restaurant_pos_mapping: Dict[str, List[POSSystemType]] = {}
+        # Registration order is kept in the tuples; the typed dicts only serve lookups by POS type
+        self._by_restaurant: Dict[str, Tuple[BasePOSIntegration, ...]] = {}
+        self._by_restaurant_typed: Dict[str, Dict[POSSystemType, BasePOSIntegration]] = {}
     
     def register_pos_integration(self, restaurant_id: str, pos_type: POSSystemType, config: Dict[str, Any]):
         """Register a POS integration for a restaurant"""
-        if restaurant_id not in self.pos_integrations:
-            self.pos_integrations[restaurant_id] = {}
-            self.restaurant_pos_mapping[restaurant_id] = []
+        # Look up the vendor record for this POS system
+        vendor = POS_VENDORS.get(pos_type)
+        if vendor is None:
+            raise ValueError(f"Unsupported POS system type: {pos_type}")
         
-        # Create the appropriate POS integration instance
-        if pos_type == POSSystemType.SUPERMENU:
-            integration = SuperMenuPOSIntegration(restaurant_id, config)
-        elif pos_type == POSSystemType.CHEERSFOOD:
-            integration = CheersFoodPOSIntegration(restaurant_id, config)
+        # Without credentials there is nothing to call, so stand in with mock replies
+        if _has_credentials(config):
+            integration = GenericPOSIntegration(restaurant_id, config, vendor)
         else:
-            raise ValueError(f"Unsupported POS system type: {pos_type}")
+            integration = NullPOSIntegration(restaurant_id, config, vendor)
         
-        self.pos_integrations[restaurant_id][pos_type] = integration
-        if pos_type not in self.restaurant_pos_mapping[restaurant_id]:
-            self.restaurant_pos_mapping[restaurant_id].append(pos_type)
+        # Re-registering a POS type replaces it in place; rebuild the read-only tuple used for fan-out
+        typed_integrations = self._by_restaurant_typed.setdefault(restaurant_id, {})
+        typed_integrations[pos_type] = integration
+        self._by_restaurant[restaurant_id] = tuple(typed_integrations.values())
         
-        logger.info(f"Registered {pos_type.value} POS integration for restaurant {restaurant_id}")
+        logger.info("Registered %s POS integration for restaurant %s", pos_type.value, restaurant_id)
     
     def get_pos_integration(self, restaurant_id: str, pos_type: POSSystemType) -> Optional[BasePOSIntegration]:
         """Get a specific POS integration for a restaurant"""
-        return self.pos_integrations.get(restaurant_id, {}).get(pos_type)
+        return self._by_restaurant_typed.get(restaurant_id, {}).get(pos_type)
     
-    def get_all_pos_integrations(self, restaurant_id: str) -> List[BasePOSIntegration]:
+    def get_all_pos_integrations(self, restaurant_id: str) -> Tuple[BasePOSIntegration, ...]:
         """Get all POS integrations for a restaurant"""
-        return list(self.pos_integrations.get(restaurant_id, {}).values())
+        return self._by_restaurant.get(restaurant_id, ())
     
     def get_primary_pos(self, restaurant_id: str) -> Optional[BasePOSIntegration]:
         """Get the primary (first registered) POS integration for a restaurant"""
@@ -617,29 +554,29 @@ class POSManager:
         """Send order to all configured POS systems for a restaurant"""
         integrations = self.get_all_pos_integrations(restaurant_id)
         if not integrations:
-            logger.warning(f"No POS integrations found for restaurant {restaurant_id}")
+            logger.warning("No POS integrations found for restaurant %s", restaurant_id)
             return []
         
-        # Send to all POS systems concurrently
-        tasks = [integration.send_order(order_data) for integration in integrations]
-        responses = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        # Handle any exceptions
-        valid_responses = []
-        for i, response in enumerate(responses):
-            if isinstance(response, Exception):
-                logger.error(f"Error sending to POS {integrations[i].pos_type}: {str(response)}")
-                valid_responses.append(POSResponse(
-                    success=False,
-                    status=OrderStatus.PENDING,
-                    message=f"Failed to send to {integrations[i].pos_type.value}",
-                    error_details=str(response),
-                    pos_system=integrations[i].pos_type
-                ))
-            else:
-                valid_responses.append(response)
+        # Most restaurants have a single POS; await it directly instead of scheduling a task
+        if len(integrations) == 1:
+            return [await self._send_safe(integrations[0], order_data)]
         
-        return valid_responses
+        # Send to all POS systems concurrently; failures come back as responses
+        return list(await asyncio.gather(*(self._send_safe(integration, order_data) for integration in integrations)))
+    
+    async def _send_safe(self, integration: BasePOSIntegration, order_data: POSOrderData) -> POSResponse:
+        """Send an order to one POS system, turning any exception into a failed response"""
+        try:
+            return await integration.send_order(order_data)
+        except Exception as e:
+            logger.exception("Error sending to POS %s", integration.vendor.tag)
+            return POSResponse.model_construct(
+                success=False,
+                status=OrderStatus.PENDING,
+                message=f"Failed to send to {integration.pos_system}",
+                error_details=str(e),
+                pos_system=integration.pos_system
+            )
     
     async def test_all_connections(self, restaurant_id: str) -> Dict[POSSystemType, bool]:
         """Test connections to all POS systems for a restaurant"""
@@ -649,19 +586,17 @@ class POSManager:
         for integration in integrations:
             try:
                 results[integration.pos_type] = await integration.test_connection()
-            except Exception as e:
-                logger.error(f"Connection test failed for {integration.pos_type}: {str(e)}")
+            except Exception:
+                logger.exception("Connection test failed for %s", integration.vendor.tag)
                 results[integration.pos_type] = False
         
         return results
-
+    
 # Global POS manager instance
 pos_manager = POSManager()
 
 def initialize_pos_systems():
     """Initialize POS systems with default configurations"""
-    import os
-    
     # Restaurant 1 - SuperMenu
     supermenu_config_1 = {
         'api_key': os.getenv('SUPERMENU_API_KEY_RESTAURANT_1', ''),
@@ -678,28 +613,28 @@ def initialize_pos_systems():
         'webhook_url': os.getenv('CHEERSFOOD_WEBHOOK_URL_2', '')
     }
     
-    try:
-        # Register POS integrations
-        pos_manager.register_pos_integration("1", POSSystemType.SUPERMENU, supermenu_config_1)
-        pos_manager.register_pos_integration("2", POSSystemType.CHEERSFOOD, cheersfood_config_2)
-        
-        logger.info("POS systems initialized successfully")
-        
-    except Exception as e:
-        logger.error(f"Error initializing POS systems: {str(e)}")
+    # Register POS integrations; errors are reported by the caller
+    pos_manager.register_pos_integration("1", POSSystemType.SUPERMENU, supermenu_config_1)
+    pos_manager.register_pos_integration("2", POSSystemType.CHEERSFOOD, cheersfood_config_2)
+    
+    logger.info("POS systems initialized successfully")
+
+# Built once so the POSOrderData schema is not re-resolved on every order
+_POS_ORDER_ADAPTER = TypeAdapter(POSOrderData)
 
 def create_pos_order_data(order_data_dict: Dict[str, Any], restaurant_id: str, pos_type: POSSystemType) -> POSOrderData:
     """Convert order data dictionary to POSOrderData object"""
-    return POSOrderData(
-        order_id=order_data_dict.get("order_id", ""),
-        order_number=order_data_dict.get("order_number", ""),
-        restaurant_id=restaurant_id,
-        customer_info=order_data_dict.get("customer_info", {}),
-        order_items=order_data_dict.get("order_details", {}).get("items", []),
-        order_type=order_data_dict.get("order_details", {}).get("order_type", "pickup"),
-        pickup_time=order_data_dict.get("order_details", {}).get("pick_up_time"),
-        special_instructions=order_data_dict.get("order_details", {}).get("order_notes"),
-        pricing=order_data_dict.get("pricing", {}),
-        payment_info=order_data_dict.get("payment", {}),
-        pos_system=pos_type
-    ) 
\ No newline at end of file
+    order_details = order_data_dict.get("order_details", {})
+    return _POS_ORDER_ADAPTER.validate_python({
+        "order_id": order_data_dict.get("order_id", ""),
+        "order_number": order_data_dict.get("order_number", ""),
+        "restaurant_id": restaurant_id,
+        "customer_info": order_data_dict.get("customer_info", {}),
+        "order_items": order_details.get("items", []),
+        "order_type": order_details.get("order_type", "pickup"),
+        "pickup_time": order_details.get("pick_up_time"),
+        "special_instructions": order_details.get("order_notes"),
+        "pricing": order_data_dict.get("pricing", {}),
+        "payment_info": order_data_dict.get("payment", {}),
+        "pos_system": pos_type.value
+    })
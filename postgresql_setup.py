@@ -4,12 +4,39 @@ PostgreSQL Setup and Migration Script
 This script helps set up PostgreSQL and migrate data from SQLite to PostgreSQL
 """
 
+import io
 import os
 import json
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from pathlib import Path
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker
-from database_models import Base, SessionLocal, Restaurant, Customer, MenuCategory, get_database_url, test_database_connection
+from sqlalchemy import create_engine, func, inspect, select, text, tuple_
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+from database_models import Base, Restaurant, Customer, MenuCategory, get_database_url, test_database_connection
+
+# Columns read from SQLite and loaded by COPY for each migrated table, in row order
+RESTAURANT_COPY_COLUMNS = ["id", "name", "address", "phone", "website", "doordash_link",
+                           "reservation_link", "timezone", "business_hours", "lunch_hours"]
+CUSTOMER_COPY_COLUMNS = ["phone_number", "name", "email", "created_at", "updated_at",
+                         "last_call_at", "preferred_pickup_time", "notes"]
+CATEGORY_COPY_COLUMNS = ["restaurant_id", "name", "display_order", "is_lunch_only"]
+
+# Binary COPY framing: signature, flags and header extension length, then a -1 field count trailer
+COPY_BINARY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0)
+COPY_BINARY_TRAILER = struct.pack(">h", -1)
+NULL_FIELD = struct.pack(">i", -1)
+PG_EPOCH = datetime(2000, 1, 1)
+
+# Rows per table printed in detail by verify_postgresql_setup
+VERIFY_DETAIL_LIMIT = 20
+
+# Engine shared by every setup phase so they reuse pooled connections
+_PG_ENGINE = None
+
+# Source rows are read and checked against PostgreSQL this many at a time
+MIGRATION_BATCH_SIZE = 5000
 
 def check_postgresql_requirements():
     """Check if PostgreSQL dependencies are installed"""
@@ -31,7 +58,7 @@ def validate_postgresql_url(database_url):
     
     try:
         # Test connection
-        engine = create_engine(database_url)
+        engine = _get_engine() if database_url == get_database_url() else create_engine(database_url)
         with engine.connect() as conn:
             result = conn.execute(text("SELECT version();"))
             version = result.fetchone()[0]
@@ -67,7 +94,13 @@ def setup_postgresql_database():
         
         # Create tables
         print("🛠️  Creating database tables...")
-        Base.metadata.create_all(bind=create_engine(database_url))
+        engine = _get_engine()
+        # One reflection query finds the missing tables; their DDL runs in a single transaction
+        existing_tables = set(inspect(engine).get_table_names())
+        missing_tables = [table for table in Base.metadata.sorted_tables if table.name not in existing_tables]
+        if missing_tables:
+            with engine.begin() as conn:
+                Base.metadata.create_all(bind=conn, tables=missing_tables, checkfirst=False)
         print("✅ Database tables created successfully!")
         
         return True
@@ -76,6 +109,215 @@ def setup_postgresql_database():
         print(f"❌ Error setting up PostgreSQL database: {str(e)}")
         return False
 
+def _get_engine():
+    """Get the shared PostgreSQL engine, creating it on first use"""
+    global _PG_ENGINE
+    if _PG_ENGINE is None:
+        database_url = get_database_url()
+        if database_url.startswith("postgresql://"):
+            # psycopg2 sends INSERT ... VALUES pages and execute_batch instead of one statement per row
+            _PG_ENGINE = create_engine(database_url, pool_pre_ping=True, pool_size=5, max_overflow=10,
+                                       executemany_mode="values_plus_batch", insertmanyvalues_page_size=1000)
+        else:
+            _PG_ENGINE = create_engine(database_url)
+    return _PG_ENGINE
+
+def _stream_batches(conn, model, columns, batch_size=MIGRATION_BATCH_SIZE):
+    """Yield a table's rows as plain tuples of the given columns, batch_size at a time"""
+    result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(
+        select(*(model.__table__.c[column] for column in columns))
+    )
+    yield from result.partitions()
+
+def _copy_value(value):
+    """Encode a value as a length-prefixed COPY ... FROM STDIN (binary format) field"""
+    if value is None:
+        return NULL_FIELD
+    if isinstance(value, bool):
+        data = b"\x01" if value else b"\x00"
+    elif isinstance(value, int):
+        # All migrated integer columns are int4
+        data = struct.pack(">i", value)
+    elif isinstance(value, datetime):
+        # timestamp is int8 microseconds since 2000-01-01
+        delta = value - PG_EPOCH
+        data = struct.pack(">q", (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds)
+    elif isinstance(value, (dict, list)):
+        # json is sent as its text form in binary COPY too
+        data = json.dumps(value).encode("utf-8")
+    else:
+        data = str(value).encode("utf-8")
+    return struct.pack(">i", len(data)) + data
+
+def _copy_rows(cursor, table, columns, rows):
+    """Bulk load rows into a table with a single binary COPY FROM STDIN"""
+    buffer = io.BytesIO()
+    buffer.write(COPY_BINARY_HEADER)
+    field_count = struct.pack(">h", len(columns))
+    for row in rows:
+        buffer.write(field_count)
+        buffer.write(b"".join(_copy_value(value) for value in row))
+    buffer.write(COPY_BINARY_TRAILER)
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT binary)", buffer)
+
+def _drop_secondary_indexes(table):
+    """Drop a table's non-unique indexes so COPY does not maintain them row by row"""
+    # Unique indexes stay: they are what enforces uniqueness (and ON CONFLICT) for live writes
+    indexes = [index for index in table.indexes if not index.unique]
+    with _get_engine().begin() as conn:
+        for index in indexes:
+            conn.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+    return indexes
+
+def _create_index_concurrently(index):
+    """Build one index without locking its table against writes"""
+    unique = "UNIQUE " if index.unique else ""
+    columns = ", ".join(column.name for column in index.columns)
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with _get_engine().connect() as conn:
+        conn.execution_options(isolation_level="AUTOCOMMIT").execute(text(
+            f"CREATE {unique}INDEX CONCURRENTLY IF NOT EXISTS {index.name} ON {index.table.name} ({columns})"
+        ))
+
+def _rebuild_secondary_indexes(indexes):
+    """Recreate dropped indexes, building them in parallel"""
+    with ThreadPoolExecutor(max_workers=len(indexes) or 1) as executor:
+        for future in [executor.submit(_create_index_concurrently, index) for index in indexes]:
+            future.result()
+    print(f"✅ Rebuilt {len(indexes)} indexes")
+
+def _load_rows(pg_engine, model, columns, rows):
+    """Bulk load collected rows into a table and commit them"""
+    if not rows:
+        return
+    
+    if pg_engine.dialect.driver == "psycopg2":
+        # Load the table with one COPY, with its secondary indexes dropped during the load
+        dropped_indexes = _drop_secondary_indexes(model.__table__)
+        try:
+            pg_connection = pg_engine.raw_connection()
+            try:
+                _copy_rows(pg_connection.cursor(), model.__tablename__, columns, rows)
+                pg_connection.commit()
+            except Exception:
+                pg_connection.rollback()
+                raise
+            finally:
+                pg_connection.close()
+        finally:
+            _rebuild_secondary_indexes(dropped_indexes)
+    else:
+        # Drivers without COPY support fall back to batched executemany inserts
+        with Session(pg_engine) as session, session.begin():
+            session.bulk_insert_mappings(model, [dict(zip(columns, row)) for row in rows])
+
+def _migrate_restaurants(sqlite_url):
+    """Copy restaurants that are not yet in PostgreSQL"""
+    sqlite_engine = create_engine(sqlite_url, poolclass=NullPool)
+    pg_engine = _get_engine()
+    restaurant_rows = []
+    skipped = 0
+    
+    with sqlite_engine.connect() as sqlite_conn, pg_engine.connect() as pg_conn:
+        for sqlite_restaurants in _stream_batches(sqlite_conn, Restaurant, RESTAURANT_COPY_COLUMNS):
+            # Check which restaurants in this batch already exist in PostgreSQL with a single query
+            existing_restaurant_ids = set(pg_conn.scalars(
+                select(Restaurant.id).where(Restaurant.id.in_([restaurant.id for restaurant in sqlite_restaurants]))
+            ).all())
+            for restaurant in sqlite_restaurants:
+                if restaurant.id not in existing_restaurant_ids:
+                    restaurant_rows.append(restaurant)
+                else:
+                    skipped += 1
+    
+    _load_rows(pg_engine, Restaurant, RESTAURANT_COPY_COLUMNS, restaurant_rows)
+    print(f"   ✅ Migrated {len(restaurant_rows)} restaurants ({skipped} already existed)")
+
+def _migrate_customers(sqlite_url):
+    """Copy customers whose phone numbers are not yet in PostgreSQL"""
+    sqlite_engine = create_engine(sqlite_url, poolclass=NullPool)
+    pg_engine = _get_engine()
+    customer_rows = []
+    skipped = 0
+    
+    with sqlite_engine.connect() as sqlite_conn, pg_engine.connect() as pg_conn:
+        for sqlite_customers in _stream_batches(sqlite_conn, Customer, CUSTOMER_COPY_COLUMNS):
+            existing_phone_numbers = set(pg_conn.scalars(
+                select(Customer.phone_number).where(
+                    Customer.phone_number.in_([customer.phone_number for customer in sqlite_customers])
+                )
+            ).all())
+            for customer in sqlite_customers:
+                if customer.phone_number not in existing_phone_numbers:
+                    customer_rows.append(customer)
+                else:
+                    skipped += 1
+    
+    _load_rows(pg_engine, Customer, CUSTOMER_COPY_COLUMNS, customer_rows)
+    print(f"   ✅ Migrated {len(customer_rows)} customers ({skipped} already existed)")
+
+def _merge_categories_on_server(sqlite_engine, pg_engine):
+    """COPY all menu categories into a staging table and insert the new ones with one statement"""
+    with sqlite_engine.connect() as sqlite_conn:
+        category_rows = [row for batch in _stream_batches(sqlite_conn, MenuCategory, CATEGORY_COPY_COLUMNS) for row in batch]
+    
+    columns = ", ".join(CATEGORY_COPY_COLUMNS)
+    pg_connection = pg_engine.raw_connection()
+    try:
+        cursor = pg_connection.cursor()
+        # Staging table has only the copied columns, so it does not draw ids from the sequence
+        cursor.execute(
+            f"CREATE TEMP TABLE menu_categories_stage ON COMMIT DROP AS "
+            f"SELECT {columns} FROM menu_categories WITH NO DATA"
+        )
+        _copy_rows(cursor, "menu_categories_stage", CATEGORY_COPY_COLUMNS, category_rows)
+        # (restaurant_id, name) has no unique constraint, so dedupe with NOT EXISTS rather than ON CONFLICT
+        cursor.execute(
+            f"INSERT INTO menu_categories ({columns}) "
+            f"SELECT {columns} FROM menu_categories_stage stage "
+            f"WHERE NOT EXISTS (SELECT 1 FROM menu_categories existing "
+            f"WHERE existing.restaurant_id = stage.restaurant_id AND existing.name = stage.name)"
+        )
+        migrated = cursor.rowcount
+        pg_connection.commit()
+    except Exception:
+        pg_connection.rollback()
+        raise
+    finally:
+        pg_connection.close()
+    
+    print(f"   ✅ Migrated {migrated} menu categories ({len(category_rows) - migrated} already existed)")
+
+def _migrate_categories(sqlite_url):
+    """Copy menu categories that are not yet in PostgreSQL"""
+    sqlite_engine = create_engine(sqlite_url, poolclass=NullPool)
+    pg_engine = _get_engine()
+    if pg_engine.dialect.driver == "psycopg2":
+        _merge_categories_on_server(sqlite_engine, pg_engine)
+        return
+    
+    category_rows = []
+    skipped = 0
+    
+    with sqlite_engine.connect() as sqlite_conn, pg_engine.connect() as pg_conn:
+        for sqlite_categories in _stream_batches(sqlite_conn, MenuCategory, CATEGORY_COPY_COLUMNS):
+            existing_categories = set(pg_conn.execute(
+                select(MenuCategory.restaurant_id, MenuCategory.name).where(
+                    tuple_(MenuCategory.restaurant_id, MenuCategory.name).in_(
+                        [(category.restaurant_id, category.name) for category in sqlite_categories]
+                    )
+                )
+            ).tuples().all())
+            for category in sqlite_categories:
+                if (category.restaurant_id, category.name) not in existing_categories:
+                    category_rows.append(category)
+                else:
+                    skipped += 1
+    
+    _load_rows(pg_engine, MenuCategory, CATEGORY_COPY_COLUMNS, category_rows)
+    print(f"   ✅ Migrated {len(category_rows)} menu categories ({skipped} already existed)")
+
 def migrate_sqlite_to_postgresql():
     """Migrate data from SQLite to PostgreSQL"""
     try:
@@ -87,85 +329,17 @@ def migrate_sqlite_to_postgresql():
         
         print("🔄 Migrating data from SQLite to PostgreSQL...")
         
-        # Connect to SQLite
-        sqlite_engine = create_engine("sqlite:///./restaurant.db")
-        SqliteSession = sessionmaker(bind=sqlite_engine)
-        sqlite_session = SqliteSession()
-        
-        # Connect to PostgreSQL
-        pg_database_url = get_database_url()
-        pg_engine = create_engine(pg_database_url)
-        PgSession = sessionmaker(bind=pg_engine)
-        pg_session = PgSession()
-        
-        # Migrate Restaurants
-        sqlite_restaurants = sqlite_session.query(Restaurant).all()
-        for restaurant in sqlite_restaurants:
-            # Check if restaurant already exists in PostgreSQL
-            existing = pg_session.query(Restaurant).filter(Restaurant.id == restaurant.id).first()
-            if not existing:
-                new_restaurant = Restaurant(
-                    id=restaurant.id,
-                    name=restaurant.name,
-                    address=restaurant.address,
-                    phone=restaurant.phone,
-                    website=restaurant.website,
-                    doordash_link=restaurant.doordash_link,
-                    reservation_link=restaurant.reservation_link,
-                    timezone=restaurant.timezone,
-                    business_hours=restaurant.business_hours,
-                    lunch_hours=restaurant.lunch_hours
-                )
-                pg_session.add(new_restaurant)
-                print(f"   ✅ Migrated restaurant: {restaurant.name}")
-            else:
-                print(f"   ⚠️  Restaurant {restaurant.name} already exists")
-        
-        # Migrate Customers
-        sqlite_customers = sqlite_session.query(Customer).all()
-        for customer in sqlite_customers:
-            existing = pg_session.query(Customer).filter(Customer.phone_number == customer.phone_number).first()
-            if not existing:
-                new_customer = Customer(
-                    phone_number=customer.phone_number,
-                    name=customer.name,
-                    email=customer.email,
-                    created_at=customer.created_at,
-                    updated_at=customer.updated_at,
-                    last_call_at=customer.last_call_at,
-                    preferred_pickup_time=customer.preferred_pickup_time,
-                    notes=customer.notes
-                )
-                pg_session.add(new_customer)
-                print(f"   ✅ Migrated customer: {customer.name or customer.phone_number}")
-            else:
-                print(f"   ⚠️  Customer {customer.phone_number} already exists")
-        
-        # Migrate Menu Categories
-        sqlite_categories = sqlite_session.query(MenuCategory).all()
-        for category in sqlite_categories:
-            existing = pg_session.query(MenuCategory).filter(
-                MenuCategory.restaurant_id == category.restaurant_id,
-                MenuCategory.name == category.name
-            ).first()
-            if not existing:
-                new_category = MenuCategory(
-                    restaurant_id=category.restaurant_id,
-                    name=category.name,
-                    display_order=category.display_order,
-                    is_lunch_only=category.is_lunch_only
-                )
-                pg_session.add(new_category)
-                print(f"   ✅ Migrated menu category: {category.name}")
-            else:
-                print(f"   ⚠️  Menu category {category.name} already exists")
-        
-        # Commit all changes
-        pg_session.commit()
-        
-        # Close sessions
-        sqlite_session.close()
-        pg_session.close()
+        sqlite_url = "sqlite:///./restaurant.db"
+        # Restaurants go first since menu categories reference them; customers
+        # and categories are independent and migrate in parallel
+        _migrate_restaurants(sqlite_url)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = [
+                executor.submit(_migrate_customers, sqlite_url),
+                executor.submit(_migrate_categories, sqlite_url),
+            ]
+            for future in futures:
+                future.result()
         
         print("✅ Data migration completed successfully!")
         return True
@@ -194,16 +368,29 @@ def verify_postgresql_setup():
             return False
         
         # Check tables and data
-        pg_session = SessionLocal()
+        pg_session = Session(_get_engine())
+        
+        # All three counts come back in one round-trip
+        restaurant_count, customer_count, category_count = pg_session.execute(select(
+            select(func.count()).select_from(Restaurant).scalar_subquery(),
+            select(func.count()).select_from(Customer).scalar_subquery(),
+            select(func.count()).select_from(MenuCategory).scalar_subquery()
+        )).one()
         
-        restaurants = pg_session.query(Restaurant).all()
-        customers = pg_session.query(Customer).all()
-        categories = pg_session.query(MenuCategory).all()
+        # Only the printed columns of the first rows are fetched for the details
+        restaurants = pg_session.execute(
+            select(Restaurant.id, Restaurant.name, Restaurant.address, Restaurant.phone)
+            .order_by(Restaurant.id).limit(VERIFY_DETAIL_LIMIT)
+        ).all()
+        customers = pg_session.execute(
+            select(Customer.name, Customer.phone_number, Customer.last_call_at)
+            .order_by(Customer.id).limit(VERIFY_DETAIL_LIMIT)
+        ).all()
         
         print(f"\nData Summary:")
-        print(f"  Restaurants: {len(restaurants)}")
-        print(f"  Customers: {len(customers)}")
-        print(f"  Menu Categories: {len(categories)}")
+        print(f"  Restaurants: {restaurant_count}")
+        print(f"  Customers: {customer_count}")
+        print(f"  Menu Categories: {category_count}")
         
         for restaurant in restaurants:
             print(f"\n  Restaurant {restaurant.id}: {restaurant.name}")
@@ -1,17 +1,37 @@
 import re
 import json
+import asyncio
+import hashlib
+import orjson
 import logging
 from fastapi import FastAPI, HTTPException, Query, Request, BackgroundTasks
-from pydantic import BaseModel, validator
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, ValidationError, field_validator
 from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime
 import pytz
 import random
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from bisect import bisect_left, bisect_right
+from dataclasses import asdict, dataclass
+from operator import attrgetter
 import google.generativeai as genai
 import os
 from pathlib import Path
 from dotenv import load_dotenv
 
+# Menu text regexes use RE2 when it is installed (pip install google-re2): it matches in
+# linear time however long or adversarial a menu is. The patterns avoid backreferences and
+# use inline flags, so the standard library re runs them unchanged otherwise.
+try:
+    import re2 as menu_re
+except ImportError:
+    menu_re = re
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -19,11 +39,26 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
+# Lunch hours are decided in restaurant-local (Eastern) time
+EASTERN_TZ = pytz.timezone('US/Eastern')
+
 # Configure cache directory
 CACHE_DIR = Path("cache")
 CACHE_DIR.mkdir(exist_ok=True)
 logger.info(f"Cache directory initialized at: {CACHE_DIR.absolute()}")
 
+# Parsed menus grouped by lowercased category and sorted by price, keyed by menu text hash;
+# the least recently used menu is dropped once the cache is full
+CATEGORY_INDEX_CACHE_SIZE = 128
+_CATEGORY_INDEX_CACHE: "OrderedDict[str, Dict[str, Tuple[List[float], List[MenuEntry]]]]" = OrderedDict()
+_CATEGORY_INDEX_LOCK = threading.Lock()
+# Per-menu locks so a burst of requests for an unparsed menu sends it to Gemini only once
+_MENU_PARSE_LOCKS: Dict[str, asyncio.Lock] = {}
+
+# Menu text hash per restaurant_id, stamped with the menu file's (mtime_ns, size) so
+# unchanged files are not re-read and re-hashed on every request
+_MENU_FILE_HASHES: Dict[str, Tuple[Tuple[int, int], str]] = {}
+
 # Configure Gemini
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 if not GEMINI_API_KEY:
@@ -42,6 +77,8 @@ except Exception as e:
 app = FastAPI(
     title="Restaurant Recommendation API",
     version="1.0.0",
+    # Encode endpoint responses with orjson
+    default_response_class=ORJSONResponse,
     # Increase payload size limit to 10MB
     openapi_url="/openapi.json",
     docs_url="/docs",
@@ -89,6 +126,17 @@ class ArgsModel(BaseModel):
     category: Optional[str] = None
     price_range: PriceRange
 
+    @field_validator('price_range', mode='before')
+    @classmethod
+    def parse_price_range_json(cls, v):
+        # Some callers send price_range as a JSON-encoded string
+        if isinstance(v, str):
+            try:
+                return orjson.loads(v)
+            except json.JSONDecodeError:
+                raise ValueError("price_range must be a valid JSON object")
+        return v
+
     class Config:
         json_schema_extra = {
             "properties": {
@@ -117,6 +165,14 @@ class ArgsModel(BaseModel):
 class RecommendationResponse(BaseModel):
     items: List[MenuItem]
 
+@dataclass(slots=True)
+class MenuEntry:
+    """A parsed menu item as held in the in-process menu index"""
+    name: str
+    price: float
+    category: str
+    is_lunch_item: bool
+
 # --- 3. MENU FILE HANDLING ---
 MENU_DIR = Path("menus")
 
@@ -142,18 +198,23 @@ def get_menu_text(restaurant_id: str) -> str:
             detail=f"Failed to read menu file: {str(e)}"
         )
 
+# Lunch hours patterns, compiled once - handle both formats:
+# "from 11:00 AM to 3:00 PM" and "11:00 AM - 3:00 PM"
+LUNCH_HOURS_PATTERNS = (
+    menu_re.compile(r"(?i)from\s+(\d{1,2}:\d{2}\s*[AaPp][Mm])\s+to\s+(\d{1,2}:\d{2}\s*[AaPp][Mm])"),
+    menu_re.compile(r"(?i)(\d{1,2}:\d{2}\s*[AaPp][Mm])\s*-\s*(\d{1,2}:\d{2}\s*[AaPp][Mm])"),
+)
+# "Monday, Tuesday, Wednesday, Thursday, Friday" and "Monday-Friday"
+WEEKDAYS_PATTERN = menu_re.compile(
+    r"(?i)Monday,\s*Tuesday,\s*Wednesday,\s*Thursday,\s*Friday|Monday\s*-\s*Friday"
+)
+
 def extract_lunch_hours(menu_text):
     """Extract lunch hours from menu text."""
     try:
-        # Look for lunch hours pattern - handle both formats:
-        # "from 11:00 AM to 3:00 PM" and "11:00 AM - 3:00 PM"
-        lunch_patterns = [
-            r"from\s+(\d{1,2}:\d{2}\s*[AaPp][Mm])\s+to\s+(\d{1,2}:\d{2}\s*[AaPp][Mm])",
-            r"(\d{1,2}:\d{2}\s*[AaPp][Mm])\s*-\s*(\d{1,2}:\d{2}\s*[AaPp][Mm])"
-        ]
-        
-        for pattern in lunch_patterns:
-            match = re.search(pattern, menu_text, re.IGNORECASE)
+        # Look for lunch hours pattern
+        for pattern in LUNCH_HOURS_PATTERNS:
+            match = pattern.search(menu_text)
             if match:
                 start_time = match.group(1).strip()
                 end_time = match.group(2).strip()
@@ -166,18 +227,8 @@ def extract_lunch_hours(menu_text):
                 start_24 = start_dt.strftime("%H:%M")
                 end_24 = end_dt.strftime("%H:%M")
                 
-                # Extract days - look for both formats:
-                # "Monday, Tuesday, Wednesday, Thursday, Friday" and "Monday-Friday"
-                days_patterns = [
-                    r"Monday,\s*Tuesday,\s*Wednesday,\s*Thursday,\s*Friday",
-                    r"Monday\s*-\s*Friday"
-                ]
-                
-                days = []
-                for days_pattern in days_patterns:
-                    if re.search(days_pattern, menu_text, re.IGNORECASE):
-                        days = list(range(5))  # 0-4 for Monday-Friday
-                        break
+                # Extract days
+                days = list(range(5)) if WEEKDAYS_PATTERN.search(menu_text) else []  # 0-4 for Monday-Friday
                 
                 logger.info(f"Extracted lunch hours: {start_24}-{end_24}, Days: {days}")
                 return {
@@ -192,38 +243,25 @@ def extract_lunch_hours(menu_text):
         logger.error(f"Error extracting lunch hours: {str(e)}")
         return None
 
+# Day abbreviations (each full day name contains its own) and their weekday numbers
+LUNCH_DAY_PATTERN = menu_re.compile(r"Mon|Tue|Wed|Thu|Fri|Sat|Sun")
+LUNCH_DAY_NUMBERS = {"Mon": 0, "Tue": 1, "Wed": 2, "Thu": 3, "Fri": 4, "Sat": 5, "Sun": 6}
+
 def extract_lunch_days(text: str) -> List[int]:
     """Extract lunch days from menu text (0=Monday, 6=Sunday)"""
-    days = []
-    if "Monday" in text or "Mon" in text:
-        days.append(0)
-    if "Tuesday" in text or "Tue" in text:
-        days.append(1)
-    if "Wednesday" in text or "Wed" in text:
-        days.append(2)
-    if "Thursday" in text or "Thu" in text:
-        days.append(3)
-    if "Friday" in text or "Fri" in text:
-        days.append(4)
-    if "Saturday" in text or "Sat" in text:
-        days.append(5)
-    if "Sunday" in text or "Sun" in text:
-        days.append(6)
-    return days if days else [0, 1, 2, 3, 4]  # Default to Mon-Fri if no days found
+    # One pass over the text, stopping early once every day has been seen
+    days = set()
+    for match in LUNCH_DAY_PATTERN.finditer(text):
+        days.add(LUNCH_DAY_NUMBERS[match.group()])
+        if len(days) == 7:
+            break
+    return sorted(days) if days else [0, 1, 2, 3, 4]  # Default to Mon-Fri if no days found
 
 # --- 4. GEMINI MENU PARSER ---
-def parse_menu_with_gemini(menu_text: str) -> List[Dict]:
-    """Parse menu text using Gemini API."""
+async def parse_menu_with_gemini(menu_text: str) -> List[Dict]:
+    """Parse menu text using Gemini API without blocking the event loop."""
     try:
-        # Configure Gemini
-        if not GEMINI_API_KEY:
-            raise ValueError("GEMINI_API_KEY not set")
-        
-        genai.configure(api_key=GEMINI_API_KEY)
-        model = genai.GenerativeModel('gemini-2.5-flash-preview-05-20')
-        logger.info("Successfully configured Gemini API")
-        
-        # Construct prompt
+        # Construct prompt (the module-level Gemini model is configured once at import)
         prompt = f"""Parse this menu into a JSON array of menu items. Return ONLY the JSON array, no other text or code.
 
 Each item in the array should be an object with these fields:
@@ -255,7 +293,7 @@ Menu text:
 {menu_text}"""
         
         # Get response from Gemini
-        response = model.generate_content(prompt)
+        response = await model.generate_content_async(prompt)
         response_text = response.text.strip()
         
         # Remove markdown code block if present
@@ -268,7 +306,7 @@ Menu text:
         
         # Parse response
         try:
-            menu_items = json.loads(response_text)
+            menu_items = orjson.loads(response_text)
             logger.info(f"Successfully parsed {len(menu_items)} menu items")
             
             # Log sample items
@@ -288,49 +326,163 @@ Menu text:
         raise
 
 # --- 5. RECOMMENDATION LOGIC ---
-def get_recommendations_from_list_thirds(items: list[dict]) -> dict:
+def get_recommendations_from_list_thirds(items: List[MenuEntry]) -> dict:
     """
     Takes a list of items, sorts it by price, divides the list into thirds,
     and randomly selects one item from each third.
     """
-    if not items:
-        return {"items": []}
-
-    # 1. Sort the list of items by price
-    sorted_items = sorted(items, key=lambda x: x['price'])
-    n = len(sorted_items)
+    n = len(items)
     
-    # Handle cases with very few items by returning a random sample
+    # Handle cases with very few items by returning a random sample; no ordering is needed
     if n < 3:
-        return {"items": random.sample(sorted_items, k=n)}
+        return {"items": random.sample(items, k=n)}
+
+    # 1. Sort the list of items by price
+    sorted_items = sorted(items, key=attrgetter('price'))
 
-    # 2. Divide the sorted LIST into three groups by index
+    # 2. Divide the sorted LIST into three index ranges
     third_size = n // 3
-    first_third_list = sorted_items[0:third_size]
-    second_third_list = sorted_items[third_size : 2 * third_size]
-    third_third_list = sorted_items[2 * third_size:]
-
-    recommendations = []
-
-    # 3. Randomly select one item from each non-empty list group
-    if first_third_list:
-        recommendations.append(random.choice(first_third_list))
-    if second_third_list:
-        recommendations.append(random.choice(second_third_list))
-    if third_third_list:
-        recommendations.append(random.choice(third_third_list))
+
+    # 3. Randomly select one item from each range without copying it out
+    randrange = random.randrange
+    recommendations = [
+        sorted_items[randrange(third_size)],
+        sorted_items[third_size + randrange(third_size)],
+        sorted_items[2 * third_size + randrange(n - 2 * third_size)],
+    ]
         
     return {"items": recommendations}
 
-def get_cached_menu(restaurant_id: int) -> Optional[List[Dict]]:
-    """Get cached menu for restaurant if it exists."""
-    cache_file = CACHE_DIR / f"menu_{restaurant_id}.json"
+def menu_text_hash(menu_text: str) -> str:
+    """Hash menu text so parsed menus are cached per menu version"""
+    return hashlib.blake2b(menu_text.encode('utf-8'), digest_size=16).hexdigest()
+
+@lru_cache(maxsize=1)
+def _lunch_hours_for_minute(minute: int) -> bool:
+    """Whether weekday lunch (11:00-15:00 Eastern) covers the given epoch minute"""
+    now = datetime.fromtimestamp(minute * 60, EASTERN_TZ)
+    return (0 <= now.weekday() <= 4) and (11 <= now.hour < 15)
+
+def menu_entry_from_item(item: Any) -> Optional[MenuEntry]:
+    """Build a MenuEntry from one Gemini menu item, or None if the item is malformed"""
+    if not isinstance(item, dict) or not item.get('name'):
+        logger.warning(f"Skipping malformed menu item: {item!r}")
+        return None
+    try:
+        price = float(item.get('price') or 0)
+    except (ValueError, TypeError):
+        logger.warning(f"Invalid price format for item: {item.get('name', 'Unknown')}")
+        return None
+    return MenuEntry(
+        str(item['name']),
+        price,
+        str(item.get('category') or ''),
+        bool(item.get('is_lunch_item', False))
+    )
+
+def build_category_index(menu_items: List[Dict]) -> Dict[str, Tuple[List[float], List[MenuEntry]]]:
+    """Group menu items by lowercased category as (sorted prices, entries sorted by price)"""
+    # Gemini output is not guaranteed to match the prompt's schema, so malformed items are skipped
+    entries = sorted(
+        filter(None, map(menu_entry_from_item, menu_items)),
+        key=attrgetter('price')
+    )
+    groups = {}
+    for entry in entries:
+        groups.setdefault(entry.category.lower(), []).append(entry)
+    return {
+        category: ([entry.price for entry in group], group)
+        for category, group in groups.items()
+    }
+
+def get_cached_category_index(menu_hash: str) -> Optional[Dict[str, Tuple[List[float], List[MenuEntry]]]]:
+    """Get the in-process category index for a menu version, if cached"""
+    with _CATEGORY_INDEX_LOCK:
+        category_index = _CATEGORY_INDEX_CACHE.get(menu_hash)
+        if category_index is not None:
+            _CATEGORY_INDEX_CACHE.move_to_end(menu_hash)
+        return category_index
+
+def cache_category_index(menu_hash: str, category_index: Dict[str, Tuple[List[float], List[MenuEntry]]]) -> None:
+    """Keep a menu's category index in process, evicting the least recently used"""
+    with _CATEGORY_INDEX_LOCK:
+        _CATEGORY_INDEX_CACHE[menu_hash] = category_index
+        _CATEGORY_INDEX_CACHE.move_to_end(menu_hash)
+        while len(_CATEGORY_INDEX_CACHE) > CATEGORY_INDEX_CACHE_SIZE:
+            _CATEGORY_INDEX_CACHE.popitem(last=False)
+
+def get_menu_hash(restaurant_id: str) -> Tuple[str, Optional[str]]:
+    """Get the restaurant's menu text hash, reading the menu file only if it changed on disk
+
+    Returns (menu_hash, menu_text); menu_text is None when the hash was already known.
+    """
+    menu_file = MENU_DIR / f"{restaurant_id}.txt"
+    try:
+        stat = menu_file.stat()
+    except OSError:
+        logger.error(f"Menu file not found: {menu_file}")
+        raise HTTPException(
+            status_code=404,
+            detail=f"Menu not found for restaurant_id: {restaurant_id}"
+        )
+    if stat.st_size == 0:
+        raise HTTPException(status_code=404, detail=f"Menu not found for restaurant_id: {restaurant_id}")
+    
+    file_stamp = (stat.st_mtime_ns, stat.st_size)
+    cached = _MENU_FILE_HASHES.get(restaurant_id)
+    if cached is not None and cached[0] == file_stamp:
+        return cached[1], None
+    
+    menu_text = get_menu_text(restaurant_id)
+    menu_hash = menu_text_hash(menu_text)
+    _MENU_FILE_HASHES[restaurant_id] = (file_stamp, menu_hash)
+    return menu_hash, menu_text
+
+async def load_category_index(restaurant_id: str, menu_hash: str, menu_text: Optional[str]) -> Optional[Dict[str, Tuple[List[float], List[MenuEntry]]]]:
+    """Get a menu's category index from memory, the disk cache, or Gemini, in that order"""
+    category_index = get_cached_category_index(menu_hash)
+    if category_index is not None:
+        return category_index
+    
+    parse_lock = _MENU_PARSE_LOCKS.setdefault(menu_hash, asyncio.Lock())
+    try:
+        async with parse_lock:
+            # Another request may have parsed this menu while we waited
+            category_index = get_cached_category_index(menu_hash)
+            if category_index is not None:
+                return category_index
+            
+            # File I/O runs on the threadpool and the Gemini call is awaited, so neither blocks the loop
+            menu_items = await run_in_threadpool(get_cached_menu, int(restaurant_id), menu_hash)
+            if not menu_items:
+                if menu_text is None:
+                    menu_text = await run_in_threadpool(get_menu_text, restaurant_id)
+                logger.info("Sending menu to Gemini for parsing")
+                menu_items = await parse_menu_with_gemini(menu_text)
+                if menu_items:
+                    logger.info(f"Parsed {len(menu_items)} menu items")
+                    await run_in_threadpool(cache_menu, int(restaurant_id), menu_items, menu_hash)
+            
+            if not menu_items:
+                return None
+            category_index = build_category_index(menu_items)
+            cache_category_index(menu_hash, category_index)
+    finally:
+        # Drop the lock whether the parse succeeded, found no items or raised, unless a
+        # later request has already replaced it
+        if _MENU_PARSE_LOCKS.get(menu_hash) is parse_lock:
+            del _MENU_PARSE_LOCKS[menu_hash]
+    return category_index
+
+def get_cached_menu(restaurant_id: int, menu_hash: str) -> Optional[List[Dict]]:
+    """Get cached menu for restaurant if it exists for this menu text."""
+    cache_file = CACHE_DIR / f"menu_{restaurant_id}_{menu_hash}.json"
     logger.info(f"Checking for cached menu at: {cache_file.absolute()}")
     
     try:
         if cache_file.exists():
-            with open(cache_file, 'r', encoding='utf-8') as f:
-                menu_items = json.load(f)
+            with open(cache_file, 'rb') as f:
+                menu_items = orjson.loads(f.read())
                 logger.info(f"Successfully loaded cached menu with {len(menu_items)} items")
                 return menu_items
         else:
@@ -340,9 +492,9 @@ def get_cached_menu(restaurant_id: int) -> Optional[List[Dict]]:
         logger.error(f"Error reading cache file {cache_file.absolute()}: {str(e)}")
         return None
 
-def cache_menu(restaurant_id: int, menu_items: List[Dict]) -> None:
-    """Cache parsed menu items."""
-    cache_file = CACHE_DIR / f"menu_{restaurant_id}.json"
+def cache_menu(restaurant_id: int, menu_items: List[Dict], menu_hash: str) -> None:
+    """Cache parsed menu items for this menu text."""
+    cache_file = CACHE_DIR / f"menu_{restaurant_id}_{menu_hash}.json"
     logger.info(f"Attempting to cache menu to: {cache_file.absolute()}")
     
     try:
@@ -351,8 +503,8 @@ def cache_menu(restaurant_id: int, menu_items: List[Dict]) -> None:
         logger.info(f"Cache directory exists at: {CACHE_DIR.absolute()}")
         
         # Write menu items to cache file
-        with open(cache_file, 'w', encoding='utf-8') as f:
-            json.dump(menu_items, f, indent=2)
+        with open(cache_file, 'wb') as f:
+            f.write(orjson.dumps(menu_items, option=orjson.OPT_INDENT_2))
         
         # Verify file was written
         if cache_file.exists():
@@ -360,20 +512,24 @@ def cache_menu(restaurant_id: int, menu_items: List[Dict]) -> None:
             logger.info(f"Successfully cached menu with {len(menu_items)} items. File size: {file_size} bytes")
         else:
             logger.error(f"Cache file was not created at {cache_file.absolute()}")
+            return
+        
+        # Remove this restaurant's caches for older menu versions, including the
+        # pre-hash menu_{id}.json file
+        stale_files = [*CACHE_DIR.glob(f"menu_{restaurant_id}_*.json"), CACHE_DIR / f"menu_{restaurant_id}.json"]
+        for stale_file in stale_files:
+            if stale_file != cache_file:
+                stale_file.unlink(missing_ok=True)
     except Exception as e:
         logger.error(f"Error caching menu to {cache_file.absolute()}: {str(e)}")
         # Log the full exception details
         import traceback
         logger.error(f"Full error details: {traceback.format_exc()}")
 
-def extract_lunch_hours_with_gemini(menu_text: str) -> Optional[Dict]:
-    """Extract lunch hours using Gemini API."""
+async def extract_lunch_hours_with_gemini(menu_text: str) -> Optional[Dict]:
+    """Extract lunch hours using Gemini API without blocking the event loop."""
     try:
-        # Configure Gemini API
-        genai.configure(api_key=GEMINI_API_KEY)
-        model = genai.GenerativeModel('gemini-2.5-flash-preview-05-20')
-        
-        # Create prompt
+        # Create prompt (the module-level Gemini model is configured once at import)
         prompt = f"""Extract lunch hours and days from this menu text. Return a JSON object with:
 - start: time in 24-hour format (HH:MM)
 - end: time in 24-hour format (HH:MM)
@@ -392,7 +548,7 @@ Menu text:
 Return ONLY the JSON object, no other text or formatting."""
 
         # Get response from Gemini
-        response = model.generate_content(prompt)
+        response = await model.generate_content_async(prompt)
         response_text = response.text.strip()
         
         # Remove markdown code block if present
@@ -405,7 +561,7 @@ Return ONLY the JSON object, no other text or formatting."""
         
         # Parse JSON response
         try:
-            lunch_hours = json.loads(response_text)
+            lunch_hours = orjson.loads(response_text)
             logger.info(f"Extracted lunch hours: {lunch_hours}")
             return lunch_hours
         except json.JSONDecodeError as e:
@@ -453,118 +609,102 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
-@app.post("/recommend", response_model=RecommendationResponse)
+def parse_recommend_args(body: Any) -> ArgsModel:
+    """Validate a /recommend request body and return its args"""
+    # Validate the request structure - handle nested args
+    if not isinstance(body, dict):
+        raise HTTPException(status_code=400, detail="Request body must be a JSON object")
+    if 'args' not in body:
+        raise HTTPException(status_code=400, detail="args is required in request body")
+    if not isinstance(body['args'], dict):
+        raise HTTPException(status_code=400, detail="args must be a JSON object")
+    
+    # Extract the nested args structure
+    nested_args = body['args']
+    if 'args' in nested_args:
+        # Handle the case where we have nested args
+        actual_args = nested_args['args']
+    else:
+        # Handle the case where args is at the top level
+        actual_args = nested_args
+    
+    if not isinstance(actual_args, dict):
+        raise HTTPException(status_code=400, detail="args must be a JSON object")
+    
+    # ArgsModel checks price_range (including the JSON string form) and the min/max numbers
+    try:
+        return ArgsModel.model_validate(actual_args)
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid args: {e.errors(include_url=False)}")
+
+def recommend_from_category_index(category_index: Dict[str, Tuple[List[float], List[MenuEntry]]], args: ArgsModel) -> dict:
+    """Pick recommendations from a menu's category index for the given args"""
+    min_price = args.price_range.min
+    max_price = args.price_range.max
+    category = args.category
+    
+    logger.info(f"Extracted - category: {category}, price_range: {args.price_range}")
+    
+    # Time-based filtering
+    is_lunch_hours = _lunch_hours_for_minute(int(time.time()) // 60)
+    logger.info(f"is_lunch_hours: {is_lunch_hours}")
+    logger.info(f"Price range: ${min_price}-${max_price}")
+    
+    # The category substring test runs once per category and the price range is a
+    # bisected slice of each category's sorted items; only the lunch flag is checked per item
+    category_lower = category.lower() if category else None
+    candidate_items = [
+        item
+        for item_category, (prices, items) in category_index.items()
+        if category_lower is None or category_lower in item_category
+        for item in items[bisect_left(prices, min_price):bisect_right(prices, max_price)]
+        if is_lunch_hours or not item.is_lunch_item
+    ]
+    logger.info(f"After time, category and price filtering: {len(candidate_items)} items")
+    
+    # Log some sample items after price filtering
+    if candidate_items:
+        logger.info("Sample items after price filtering:")
+        for item in candidate_items[:3]:
+            logger.info(f"Item: {item.name}, Price: ${item.price}, Category: {item.category}")
+    
+    # Pass the final list of candidates to the recommendation logic
+    result = get_recommendations_from_list_thirds(candidate_items)
+    logger.info(f"Final recommendations: {len(result['items'])} items")
+    # Menu entries were checked and coerced when the category index was built, so they
+    # are returned as plain dicts instead of being re-validated into MenuItem models
+    return {"items": [asdict(item) for item in result["items"]]}
+
+async def get_recommendation(body: Any, restaurant_id: str) -> dict:
+    """Get recommendations for a parsed /recommend request body"""
+    args = parse_recommend_args(body)
+    
+    # Load menu; the caches are keyed by the menu text hash so edits re-parse, and warm
+    # requests for an unchanged menu file only stat it (on the threadpool, off the loop)
+    menu_hash, menu_text = await run_in_threadpool(get_menu_hash, restaurant_id)
+    category_index = await load_category_index(restaurant_id, menu_hash, menu_text)
+    if category_index is None:
+        return get_recommendations_from_list_thirds([])
+    
+    # Filtering is a few bisected slices of the cached index, cheap enough to run on the loop
+    return recommend_from_category_index(category_index, args)
+
+@app.post("/recommend", response_model=None, responses={200: {"model": RecommendationResponse}})
 async def recommend(request: Request, restaurant_id: str = Query(..., description="Restaurant ID")):
     try:
         # Parse the request body
         body = await request.json()
         logger.info(f"Raw request body: {body}")
         
-        # Validate the request structure - handle nested args
-        if not isinstance(body, dict):
-            raise HTTPException(status_code=400, detail="Request body must be a JSON object")
-        if 'args' not in body:
-            raise HTTPException(status_code=400, detail="args is required in request body")
-        if not isinstance(body['args'], dict):
-            raise HTTPException(status_code=400, detail="args must be a JSON object")
-        
-        # Extract the nested args structure
-        nested_args = body['args']
-        if 'args' in nested_args:
-            # Handle the case where we have nested args
-            actual_args = nested_args['args']
-        else:
-            # Handle the case where args is at the top level
-            actual_args = nested_args
-        
-        if not isinstance(actual_args, dict):
-            raise HTTPException(status_code=400, detail="args must be a JSON object")
-        if 'price_range' not in actual_args:
-            raise HTTPException(status_code=400, detail="price_range is required in args")
-        
-        # Extract and validate price_range
-        price_range = actual_args['price_range']
-        if isinstance(price_range, str):
-            try:
-                price_range = json.loads(price_range)
-            except json.JSONDecodeError:
-                raise HTTPException(status_code=400, detail="price_range must be a valid JSON object")
-        
-        if not isinstance(price_range, dict):
-            raise HTTPException(status_code=400, detail="price_range must be a JSON object")
-        if 'min' not in price_range or 'max' not in price_range:
-            raise HTTPException(status_code=400, detail="price_range must contain min and max values")
-        
-        try:
-            min_price = float(price_range['min'])
-            max_price = float(price_range['max'])
-        except (TypeError, ValueError):
-            raise HTTPException(status_code=400, detail="price_range min and max must be numbers")
-        
-        # Extract category
-        category = actual_args.get('category')
-        
-        logger.info(f"Extracted - category: {category}, price_range: {price_range}")
-        
-        # Load menu
-        menu_text = get_menu_text(restaurant_id)
-        if not menu_text:
-            raise HTTPException(status_code=404, detail=f"Menu not found for restaurant_id: {restaurant_id}")
-        
-        # Get cached menu or parse new one
-        menu_items = get_cached_menu(int(restaurant_id))
-        if not menu_items:
-            logger.info("Sending menu to Gemini for parsing")
-            menu_items = parse_menu_with_gemini(menu_text)
-            if menu_items:
-                logger.info(f"Parsed {len(menu_items)} menu items")
-                cache_menu(int(restaurant_id), menu_items)
-        
-        # Time-based filtering
-        tz = pytz.timezone('US/Eastern')
-        now = datetime.now(tz)
-        is_lunch_hours = (0 <= now.weekday() <= 4) and (11 <= now.hour < 15)
-        logger.info(f"Current time: {now}, is_lunch_hours: {is_lunch_hours}")
-        
-        if is_lunch_hours:
-            time_filtered_menu = menu_items
-        else:
-            time_filtered_menu = [item for item in menu_items if not item.get("is_lunch_item", False)]
-        logger.info(f"After time filtering: {len(time_filtered_menu)} items")
-        
-        # Filter by category first, if provided
-        if category:
-            candidate_items = [item for item in time_filtered_menu if category.lower() in item['category'].lower()]
-            logger.info(f"After category filtering: {len(candidate_items)} items")
-        else:
-            candidate_items = time_filtered_menu
-        
-        # Apply price range filter
-        logger.info(f"Price range: ${min_price}-${max_price}")
-        
-        # Log some sample items before price filtering
-        if candidate_items:
-            logger.info("Sample items before price filtering:")
-            for item in candidate_items[:3]:
-                logger.info(f"Item: {item.get('name')}, Price: ${item.get('price')}, Category: {item.get('category')}")
-        
-        candidate_items = [item for item in candidate_items if min_price <= item.get("price", 0) <= max_price]
-        logger.info(f"After price filtering: {len(candidate_items)} items")
-        
-        # Log some sample items after price filtering
-        if candidate_items:
-            logger.info("Sample items after price filtering:")
-            for item in candidate_items[:3]:
-                logger.info(f"Item: {item.get('name')}, Price: ${item.get('price')}, Category: {item.get('category')}")
-        
-        # Pass the final list of candidates to the recommendation logic
-        result = get_recommendations_from_list_thirds(candidate_items)
-        logger.info(f"Final recommendations: {len(result['items'])} items")
-        return result
+        # Returning the response directly skips FastAPI's jsonable_encoder walk
+        return ORJSONResponse(await get_recommendation(body, restaurant_id))
         
     except json.JSONDecodeError as e:
         logger.error(f"JSON decode error: {str(e)}")
         raise HTTPException(status_code=400, detail="Invalid JSON in request body")
+    except HTTPException:
+        # Keep the 400/404 raised for invalid args or an unknown restaurant
+        raise
     except Exception as e:
         import traceback
         error_details = traceback.format_exc()
@@ -1,2 +1,2 @@
 #!/bin/bash
-uvicorn recommend:app --host 0.0.0.0 --port $PORT 
\ No newline at end of file
+uvicorn recommend:app --host 0.0.0.0 --port $PORT --loop uvloop --http httptools 
\ No newline at end of file
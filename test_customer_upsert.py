@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from business_operations import Base, Customer, upsert_customer
+
+def new_session():
+    """Open a session on a fresh in-memory SQLite database"""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    return Session(engine)
+
+def test_insert_then_update_returns_same_id():
+    """Test the insert and update paths return the same customer id"""
+    print("=== Testing Upsert Returns Same Id ===")
+    with new_session() as db:
+        inserted_id = upsert_customer(db, "(555) 123-4567", "Alice")
+        db.commit()
+        updated_id = upsert_customer(db, "555-123-4567", "Alice Smith")
+        db.commit()
+        print(f"Inserted id: {inserted_id}, updated id: {updated_id}")
+        assert inserted_id == updated_id
+        assert db.query(Customer).count() == 1
+    print()
+
+def test_update_sets_latest_name():
+    """Test an existing customer's name is updated, and kept when no name is given"""
+    print("=== Testing Upsert Updates Name ===")
+    with new_session() as db:
+        customer_id = upsert_customer(db, "5551234567", "Alice")
+        db.commit()
+        upsert_customer(db, "5551234567", "Alice Smith")
+        db.commit()
+        customer = db.get(Customer, customer_id)
+        print(f"After rename: {customer.phone_number} {customer.name}")
+        assert customer.name == "Alice Smith"
+
+        upsert_customer(db, "5551234567", "  ")
+        db.commit()
+        db.refresh(customer)
+        print(f"After blank name: {customer.phone_number} {customer.name}")
+        assert customer.name == "Alice Smith"
+    print()
+
+def main():
+    """Run all customer upsert tests"""
+    print("🧪 Testing upsert_customer against SQLite")
+    print("=" * 50)
+    test_insert_then_update_returns_same_id()
+    test_update_sets_latest_name()
+    print("✅ Customer upsert tests passed!")
+
+if __name__ == "__main__":
+    main()
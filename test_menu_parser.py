@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+
+from pathlib import Path
+from migrate_data_to_db import load_menu_file
+
+# Categories and items parse_menu should find in each checked-in menu file
+EXPECTED_COUNTS = {
+    1: (10, 176),
+    2: (18, 188),
+}
+
+def load_menu(restaurant_id):
+    """Parse a checked-in menu file into {item name: item}"""
+    with open(Path(__file__).parent / "menus" / f"{restaurant_id}.txt", 'rb') as menu_file:
+        menu = load_menu_file(menu_file)
+    return menu, {item["name"]: item for _, items in menu for item in items}
+
+def test_menu_counts():
+    """Test every checked-in menu parses into the expected number of categories and items"""
+    print("=== Testing Menu Counts ===")
+    for restaurant_id, (category_count, item_count) in EXPECTED_COUNTS.items():
+        menu, _ = load_menu(restaurant_id)
+        parsed = (len(menu), sum(len(items) for _, items in menu))
+        print(f"Restaurant {restaurant_id}: {parsed[0]} categories, {parsed[1]} items")
+        assert parsed == (category_count, item_count), f"expected {category_count} categories, {item_count} items"
+    print()
+
+def test_menu_item_shapes():
+    """Test one item of each markdown shape in menus/2.txt"""
+    print("=== Testing Menu Item Shapes ===")
+    _, items = load_menu(2)
+    expected = {
+        # ### **Name** / *ID* / *description* / **$price** block
+        "Yaki Dori": ("1312", 10.50),
+        # ## heading item block with a plain price
+        "Spider Hand Roll": ("1340", 11.50),
+        # ### Name - $price heading
+        "Veggie Box": ("1442", 18.00),
+        # - **Variant**: **$price** lines under a block
+        "Special Oysters (2 pc)": ("1630", 9.95),
+        "Fried Mochi Ice Cream (MATCHA GREEN TEA)": ("1332", 14.00),
+        # (modifier: ...) line before the price
+        "California Roll": ("1393", 7.00),
+        # block without an *ID* line
+        "Torch me slowly Roll": ("", 19.00),
+        # - **Name** - $price list item with an indented *ID* line
+        "Egg Sampler Hand Roll": ("1351", 23.00),
+    }
+    for name, (item_id, price) in expected.items():
+        item = items.get(name)
+        print(f"{name}: {item}")
+        assert item is not None, f"{name} was not parsed"
+        assert (item["item_id"], item["price"]) == (item_id, price), f"{name} parsed as {item}"
+    print()
+
+def main():
+    """Run all menu parser tests"""
+    print("🧪 Testing menu parser against the checked-in menus")
+    print("=" * 50)
+    test_menu_counts()
+    test_menu_item_shapes()
+    print("✅ Menu parser tests passed!")
+
+if __name__ == "__main__":
+    main()
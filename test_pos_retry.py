@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+
+import asyncio
+import httpx
+import pos_integrations
+from pos_integrations import GenericPOSIntegration, SUPERMENU_VENDOR, POS_RETRY_ATTEMPTS
+
+CONFIG = {"api_key": "test-key", "api_url": "https://pos.test", "restaurant_id": "1"}
+
+def count_calls(method, failure):
+    """Call _call_api against a mock POS that always fails; return (request count, error)"""
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if isinstance(failure, int):
+            return httpx.Response(failure, request=request)
+        raise failure("mock POS failure", request=request)
+
+    original_client = httpx.AsyncClient
+    original_delay = pos_integrations.POS_RETRY_INITIAL_DELAY
+    # Route _call_api's client through the mock transport and skip the backoff sleeps
+    pos_integrations.httpx.AsyncClient = lambda **kwargs: original_client(transport=httpx.MockTransport(handler), **kwargs)
+    pos_integrations.POS_RETRY_INITIAL_DELAY = 0
+    try:
+        integration = GenericPOSIntegration("1", CONFIG, SUPERMENU_VENDOR)
+        asyncio.run(integration._call_api(method, "/orders", {"id": "1"} if method in ("POST", "PUT") else None))
+        error = None
+    except httpx.HTTPError as e:
+        error = e
+    finally:
+        pos_integrations.httpx.AsyncClient = original_client
+        pos_integrations.POS_RETRY_INITIAL_DELAY = original_delay
+    return len(calls), error
+
+def test_non_idempotent_methods_fail_fast():
+    """Test POST and DELETE are not resent after a 5xx or a read timeout"""
+    print("=== Testing POST/DELETE Fail Fast ===")
+    for method in ("POST", "DELETE"):
+        for failure in (502, httpx.ReadTimeout):
+            calls, error = count_calls(method, failure)
+            print(f"{method} on {getattr(failure, '__name__', failure)}: {calls} call(s), raised {type(error).__name__}")
+            assert calls == 1
+            assert error is not None
+    print()
+
+def test_idempotent_methods_retry():
+    """Test GET and PUT retry 5xx responses and read timeouts up to POS_RETRY_ATTEMPTS"""
+    print("=== Testing GET/PUT Retry ===")
+    for method in ("GET", "PUT"):
+        for failure in (502, httpx.ReadTimeout):
+            calls, error = count_calls(method, failure)
+            print(f"{method} on {getattr(failure, '__name__', failure)}: {calls} call(s), raised {type(error).__name__}")
+            assert calls == POS_RETRY_ATTEMPTS
+            assert error is not None
+    print()
+
+def test_connect_errors_retry_and_client_errors_do_not():
+    """Test connection failures retry for any method and 4xx responses never retry"""
+    print("=== Testing Connect Errors and 4xx ===")
+    for method in ("POST", "GET"):
+        calls, _ = count_calls(method, httpx.ConnectError)
+        print(f"{method} on ConnectError: {calls} call(s)")
+        assert calls == POS_RETRY_ATTEMPTS
+        calls, _ = count_calls(method, 400)
+        print(f"{method} on 400: {calls} call(s)")
+        assert calls == 1
+    print()
+
+def main():
+    """Run all POS retry tests"""
+    print("🧪 Testing POS API retry policy")
+    print("=" * 50)
+    test_non_idempotent_methods_fail_fast()
+    test_idempotent_methods_retry()
+    test_connect_errors_retry_and_client_errors_do_not()
+    print("✅ POS retry tests passed!")
+
+if __name__ == "__main__":
+    main()
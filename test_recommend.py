@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+
+import asyncio
+import os
+import tempfile
+from pathlib import Path
+import httpx
+
+# recommend.py configures Gemini at import; these tests never reach the Gemini call
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+import recommend
+
+VALID_BODY = {"args": {"price_range": {"min": 0, "max": 100}}}
+
+async def post_recommend(restaurant_id, body):
+    """POST /recommend to the recommendation app in process"""
+    transport = httpx.ASGITransport(app=recommend.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.post(f"/recommend?restaurant_id={restaurant_id}", json=body)
+
+def test_unknown_restaurant_returns_404():
+    """Test a restaurant without a menu file gets 404, not 500"""
+    print("=== Testing Unknown Restaurant ===")
+    original_menu_dir = recommend.MENU_DIR
+    with tempfile.TemporaryDirectory() as menu_dir:
+        recommend.MENU_DIR = Path(menu_dir)
+        try:
+            response = asyncio.run(post_recommend("99", VALID_BODY))
+        finally:
+            recommend.MENU_DIR = original_menu_dir
+    print(f"Status Code: {response.status_code}")
+    print(f"Response: {response.text}")
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Menu not found for restaurant_id: 99"
+    print()
+
+def test_empty_menu_returns_404():
+    """Test a restaurant whose menu file is empty gets 404"""
+    print("=== Testing Empty Menu ===")
+    original_menu_dir = recommend.MENU_DIR
+    with tempfile.TemporaryDirectory() as menu_dir:
+        (Path(menu_dir) / "98.txt").touch()
+        recommend.MENU_DIR = Path(menu_dir)
+        try:
+            response = asyncio.run(post_recommend("98", VALID_BODY))
+        finally:
+            recommend.MENU_DIR = original_menu_dir
+    print(f"Status Code: {response.status_code}")
+    print(f"Response: {response.text}")
+    assert response.status_code == 404
+    print()
+
+def main():
+    """Run all recommendation endpoint tests"""
+    print("🧪 Testing the recommendation endpoint")
+    print("=" * 50)
+    test_unknown_restaurant_returns_404()
+    test_empty_menu_returns_404()
+    print("✅ Recommendation endpoint tests passed!")
+
+if __name__ == "__main__":
+    main()